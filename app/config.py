@@ -9,6 +9,9 @@ PINECONE_API_KEY = os.environ.get("PINECONE_API_KEY")        # for vector DB (la
 # LLM (for generator step later; we’re just recording intent here)
 LLM_PROVIDER = "google"
 LLM_MODEL_NAME = "models/gemini-2.5-flash"
+# Ask for notes+summary+MCQs in one call: the context is billed once instead of three
+# times, but output decodes serially, so it is slower than the default parallel calls.
+FUSED_GENERATION = os.environ.get("FUSED_GENERATION", "").lower() in ("1", "true", "yes")
 
 # Embeddings (local + free)
 EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"  # SentenceTransformers
@@ -31,12 +34,29 @@ TOKENIZER = "o200k_base"  # fallbacks to cl100k_base if unavailable
 TOP_K = 8
 USE_MMR = False
 MMR_LAMBDA = 0.5
+# Token budget for the retrieved context packed into each generation prompt
+MAX_CONTEXT_TOKENS = 1500
 
 # ==== Translation (LibreTranslate) ====
 LT_URL = os.environ.get("LT_URL", "https://libretranslate.com")
 LT_API_KEY = os.environ.get("LT_API_KEY", "")
 PREFERRED_LANGUAGE = "en" 
 
+# ==== Outputs ====
+# Result JSON is written compact; set PRETTY_JSON=1 to indent it for debugging.
+PRETTY_JSON = os.environ.get("PRETTY_JSON", "").lower() in ("1", "true", "yes")
+# On-disk cache of generated topic content (LRU by size); 0 disables it.
+CONTENT_CACHE_MAX_MB = int(os.environ.get("CONTENT_CACHE_MAX_MB", "256"))
+# Threads per server process for pipeline runs submitted as background jobs.
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "4"))
+# Seconds a background job's status record (and its result) is kept before it is deleted.
+JOB_TTL = int(os.environ.get("JOB_TTL", "86400"))
+# Opt-in: reuse generated content for a request on the same source and topic whose
+# queries embed at least this similar to an earlier one; 0 (default) disables it.
+SEMANTIC_CACHE_THRESHOLD = float(os.environ.get("SEMANTIC_CACHE_THRESHOLD", "0"))
+# Seconds a fetched transcript / article stays reusable from the cache; 0 always refetches.
+SOURCE_CACHE_TTL = int(os.environ.get("SOURCE_CACHE_TTL", "86400"))
+
 # Pinecone serverless location (edit if needed)
 PINECONE_CLOUD = "aws"
 PINECONE_REGION = "us-east-1"
@@ -51,6 +71,7 @@ cfg = SimpleNamespace(
     # Models
     LLM_PROVIDER=LLM_PROVIDER,
     LLM_MODEL_NAME=LLM_MODEL_NAME,
+    FUSED_GENERATION=FUSED_GENERATION,
     EMBEDDING_MODEL_NAME=EMBEDDING_MODEL_NAME,
     
     # Paths
@@ -70,11 +91,20 @@ cfg = SimpleNamespace(
     TOP_K=TOP_K,
     USE_MMR=USE_MMR,
     MMR_LAMBDA=MMR_LAMBDA,
+    MAX_CONTEXT_TOKENS=MAX_CONTEXT_TOKENS,
     
     # Translation
     LT_URL=LT_URL,
     LT_API_KEY=LT_API_KEY,
     PREFERRED_LANGUAGE=PREFERRED_LANGUAGE,
+
+    # Outputs
+    PRETTY_JSON=PRETTY_JSON,
+    CONTENT_CACHE_MAX_MB=CONTENT_CACHE_MAX_MB,
+    JOB_WORKERS=JOB_WORKERS,
+    JOB_TTL=JOB_TTL,
+    SEMANTIC_CACHE_THRESHOLD=SEMANTIC_CACHE_THRESHOLD,
+    SOURCE_CACHE_TTL=SOURCE_CACHE_TTL,
     
     # Pinecone
     PINECONE_CLOUD=PINECONE_CLOUD,
@@ -45,39 +45,52 @@ from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+
+def _parse_request():
+    """Return ((url, plan_text, topics, level, style), None) or (None, error_response)."""
+    data = request.get_json()
+    if not data:
+        return None, (jsonify({"error": "Request body is required"}), 400)
+
+    url = data.get("url")
+    plan_text = data.get("plan_text")
+    topics = data.get("topics", [])
+    level = data.get("level", "undergraduate")
+    style = data.get("style", "detailed")
+
+    if not url or not plan_text or not topics:
+        return None, (jsonify({"error": "url, plan_text, and topics are required"}), 400)
+    return (url, plan_text, topics, level, style), None
+
+
+def _run(url, plan_text, topics, level, style):
+    """Run the pipeline and build the success response body."""
+    logger.info(f"Starting article pipeline for URL: {url}")
+    result = run_pipeline(url, plan_text, topics, level, style)
+
+    # --- Extract PPT path if present ---
+    ppt_filename = None
+    if result and isinstance(result, dict):
+        full_ppt_path = result.get("_ppt_path") or result.get("ppt_path")
+        if full_ppt_path:
+            try:
+                ppt_filename = Path(full_ppt_path).name
+            except Exception:
+                ppt_filename = str(full_ppt_path).split("/")[-1].split("\\")[-1]
+
+    return {
+        "status": "success",
+        "data": result,
+        "ppt_filename": ppt_filename,
+    }
+
+
 def run_pipeline_controller():
     try:
-        data = request.get_json()
-        if not data:
-            return jsonify({"error": "Request body is required"}), 400
-
-        url = data.get("url")
-        plan_text = data.get("plan_text")
-        topics = data.get("topics", [])
-        level = data.get("level", "undergraduate")
-        style = data.get("style", "detailed")
-
-        if not url or not plan_text or not topics:
-            return jsonify({"error": "url, plan_text, and topics are required"}), 400
-
-        logger.info(f"Starting article pipeline for URL: {url}")
-        result = run_pipeline(url, plan_text, topics, level, style)
-
-        # --- Extract PPT path if present ---
-        ppt_filename = None
-        if result and isinstance(result, dict):
-            full_ppt_path = result.get("_ppt_path") or result.get("ppt_path")
-            if full_ppt_path:
-                try:
-                    ppt_filename = Path(full_ppt_path).name
-                except Exception:
-                    ppt_filename = str(full_ppt_path).split("/")[-1].split("\\")[-1]
-
-        return jsonify({
-            "status": "success",
-            "data": result,
-            "ppt_filename": ppt_filename,
-        }), 200
+        args, error = _parse_request()
+        if error is not None:
+            return error
+        return jsonify(_run(*args)), 200
 
     except ValueError as ve:
         logger.error(f"Validation error: {str(ve)}")
@@ -85,3 +98,13 @@ def run_pipeline_controller():
     except Exception as e:
         logger.error(f"Pipeline error: {str(e)}")
         return jsonify({"error": f"Pipeline failed: {str(e)}"}), 500
+
+
+def submit_pipeline_controller():
+    """Queue the pipeline as a background job; poll GET /api/jobs/<job_id> for the result."""
+    from app.services import jobs
+    args, error = _parse_request()
+    if error is not None:
+        return error
+    job_id = jobs.submit(_run, *args, dedupe_key=f"article:{jobs.fingerprint(args)}")
+    return jsonify({"status": "accepted", "job_id": job_id}), 202
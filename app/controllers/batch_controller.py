@@ -0,0 +1,52 @@
+from flask import jsonify, request
+import logging
+
+logger = logging.getLogger(__name__)
+
+# A batch shares the Gemini quota with every other request, so cap its size and
+# how many generate_all calls it keeps in flight.
+MAX_BATCH_ITEMS = 50
+BATCH_CONCURRENCY = 8
+
+# Per-item fields forwarded to generate_all
+_ITEM_FIELDS = ("namespace", "topic", "queries", "level", "style", "language", "final_k", "mcq_count")
+
+
+def _parse_request():
+    """Return (items, None) or (None, error_response)."""
+    data = request.get_json()
+    if not data:
+        return None, (jsonify({"error": "Request body is required"}), 400)
+
+    items = data.get("items")
+    if not isinstance(items, list) or not items:
+        return None, (jsonify({"error": "items must be a non-empty list"}), 400)
+    if len(items) > MAX_BATCH_ITEMS:
+        return None, (jsonify({"error": f"At most {MAX_BATCH_ITEMS} items per batch"}), 400)
+
+    parsed = []
+    for i, item in enumerate(items):
+        if not isinstance(item, dict) or not item.get("namespace") or not item.get("topic") \
+                or not isinstance(item.get("queries"), list) or not item["queries"]:
+            return None, (jsonify({"error": f"items[{i}]: namespace, topic and queries are required"}), 400)
+        parsed.append({k: item[k] for k in _ITEM_FIELDS if k in item})
+    return parsed, None
+
+
+def _run(items):
+    from app.services.generator import generate_all_batch
+    logger.info(f"Starting batch generation for {len(items)} items")
+    return {
+        "status": "success",
+        "results": generate_all_batch(items, max_concurrency=BATCH_CONCURRENCY),
+    }
+
+
+def submit_batch_controller():
+    """Queue the batch as a background job; poll GET /api/jobs/<job_id> for the result."""
+    from app.services import jobs
+    items, error = _parse_request()
+    if error is not None:
+        return error
+    job_id = jobs.submit(_run, items, dedupe_key=f"batch:{jobs.fingerprint(items)}")
+    return jsonify({"status": "accepted", "job_id": job_id}), 202
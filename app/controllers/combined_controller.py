@@ -125,55 +125,70 @@
 #             "message": f"Pipeline failed: {str(e)}"
 #         }), 500
 from flask import request, jsonify
-import logging, json
+import logging
+import orjson
 from pathlib import Path
 from app.main.main_combined import run_pipeline
 
 logger = logging.getLogger(__name__)
 
+
+def _parse_form():
+    """Return (fields, None) or (None, error_response). fields holds run_pipeline's arguments."""
+    videos_str = request.form.get('videos', '[]')
+    articles_str = request.form.get('articles', '[]')
+    plan_text = request.form.get('plan_text')
+    topics_str = request.form.get('topics')
+    level = request.form.get('level', 'beginner')
+    style = request.form.get('style', 'concise')
+    uploaded_files = request.files.getlist('files')
+
+    if not videos_str.strip() and not articles_str.strip() and not uploaded_files:
+        return None, (jsonify({"status": "error", "message": "At least one source (videos, articles, or files) must be provided"}), 400)
+
+    try:
+        videos = orjson.loads(videos_str) if videos_str.strip() else []
+        articles = orjson.loads(articles_str) if articles_str.strip() else []
+        topics = orjson.loads(topics_str) if topics_str else []
+    except orjson.JSONDecodeError as e:
+        return None, (jsonify({"status": "error", "message": f"Invalid JSON format: {str(e)}"}), 400)
+
+    if not plan_text:
+        return None, (jsonify({"status": "error", "message": "Missing required field: plan_text"}), 400)
+    if not topics or not isinstance(topics, list):
+        return None, (jsonify({"status": "error", "message": "topics must be a non-empty list"}), 400)
+
+    sources = {"videos": videos, "articles": articles, "files": uploaded_files}
+    return {"sources": sources, "plan_text": plan_text, "topics": topics, "level": level, "style": style}, None
+
+
+def _run(**fields):
+    """Run the pipeline and build the success response body."""
+    result = run_pipeline(**fields)
+
+    # --- Extract PPT path if present ---
+    ppt_filename = None
+    if result and isinstance(result, dict):
+        full_ppt_path = result.get("_ppt_path") or result.get("ppt_path")
+        if full_ppt_path:
+            try:
+                ppt_filename = Path(full_ppt_path).name
+            except Exception:
+                ppt_filename = str(full_ppt_path).split("/")[-1].split("\\")[-1]
+
+    return {
+        "status": "success",
+        "data": result,
+        "ppt_filename": ppt_filename,
+    }
+
+
 def run_pipeline_controller():
     try:
-        videos_str = request.form.get('videos', '[]')
-        articles_str = request.form.get('articles', '[]')
-        plan_text = request.form.get('plan_text')
-        topics_str = request.form.get('topics')
-        level = request.form.get('level', 'beginner')
-        style = request.form.get('style', 'concise')
-        uploaded_files = request.files.getlist('files')
-
-        if not videos_str.strip() and not articles_str.strip() and not uploaded_files:
-            return jsonify({"status": "error", "message": "At least one source (videos, articles, or files) must be provided"}), 400
-
-        try:
-            videos = json.loads(videos_str) if videos_str.strip() else []
-            articles = json.loads(articles_str) if articles_str.strip() else []
-            topics = json.loads(topics_str) if topics_str else []
-        except json.JSONDecodeError as e:
-            return jsonify({"status": "error", "message": f"Invalid JSON format: {str(e)}"}), 400
-
-        if not plan_text:
-            return jsonify({"status": "error", "message": "Missing required field: plan_text"}), 400
-        if not topics or not isinstance(topics, list):
-            return jsonify({"status": "error", "message": "topics must be a non-empty list"}), 400
-
-        sources = {"videos": videos, "articles": articles, "files": uploaded_files}
-        result = run_pipeline(sources=sources, plan_text=plan_text, topics=topics, level=level, style=style)
-
-        # --- Extract PPT path if present ---
-        ppt_filename = None
-        if result and isinstance(result, dict):
-            full_ppt_path = result.get("_ppt_path") or result.get("ppt_path")
-            if full_ppt_path:
-                try:
-                    ppt_filename = Path(full_ppt_path).name
-                except Exception:
-                    ppt_filename = str(full_ppt_path).split("/")[-1].split("\\")[-1]
-
-        return jsonify({
-            "status": "success",
-            "data": result,
-            "ppt_filename": ppt_filename,
-        }), 200
+        fields, error = _parse_form()
+        if error is not None:
+            return error
+        return jsonify(_run(**fields)), 200
 
     except ValueError as e:
         logger.error(f"Validation error: {str(e)}")
@@ -182,3 +197,37 @@ def run_pipeline_controller():
         logger.error(f"Pipeline error: {str(e)}")
         import traceback; logger.error(traceback.format_exc())
         return jsonify({"status": "error", "message": f"Pipeline failed: {str(e)}"}), 500
+
+
+def _detach_upload(file_storage):
+    """
+    Copy an upload out of the request so a background job can read it after the
+    response is sent (Werkzeug closes request files at the end of the request).
+    """
+    import shutil
+    import tempfile
+    from werkzeug.datastructures import FileStorage
+    from app.services.file_extractor import IN_MEMORY_MAX_BYTES
+
+    spool = tempfile.SpooledTemporaryFile(max_size=IN_MEMORY_MAX_BYTES)
+    shutil.copyfileobj(file_storage.stream, spool, 1024 * 1024)
+    spool.seek(0)
+    return FileStorage(stream=spool, filename=file_storage.filename, content_type=file_storage.content_type)
+
+
+def submit_pipeline_controller():
+    """Queue the pipeline as a background job; poll GET /api/jobs/<job_id> for the result."""
+    from app.services import jobs
+    fields, error = _parse_form()
+    if error is not None:
+        return error
+
+    files = fields["sources"]["files"]
+    dedupe_key = None
+    if not files:
+        # Identical URL-only submissions share one run; uploads are never deduplicated.
+        dedupe_key = f"combined:{jobs.fingerprint({**fields, 'sources': {**fields['sources'], 'files': []}})}"
+    fields["sources"]["files"] = [_detach_upload(f) for f in files]
+
+    job_id = jobs.submit(_run, dedupe_key=dedupe_key, **fields)
+    return jsonify({"status": "accepted", "job_id": job_id}), 202
@@ -100,7 +100,8 @@
 #             "message": f"Pipeline failed: {str(e)}"
 #         }), 500
 from flask import request, jsonify
-import logging, json
+import logging
+import orjson
 from pathlib import Path
 from app.main.main_file_upload import run_pipeline
 
@@ -129,10 +130,10 @@ def upload_files_controller():
             return jsonify({"status": "error", "message": "Missing required field: topics"}), 400
 
         try:
-            topics = json.loads(topics_str)
+            topics = orjson.loads(topics_str)
             if not isinstance(topics, list) or not topics:
                 raise ValueError("topics must be a non-empty list")
-        except (json.JSONDecodeError, ValueError) as e:
+        except ValueError as e:  # orjson.JSONDecodeError is a ValueError
             return jsonify({"status": "error", "message": f"Invalid topics format: {str(e)}"}), 400
 
         logger.info(f"Processing file: {file_storage.filename}")
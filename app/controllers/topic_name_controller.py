@@ -1,46 +1,62 @@
-from flask import request, jsonify
+from flask import request, jsonify, Response
 from app.main.main_topic_name import generate_content_from_plan
-import json
+import orjson
+import queue
+import threading
 from pathlib import Path
 
+
+def _parse_request():
+    """Return (plan_dict, level, style, None) or (None, None, None, error_response)."""
+    data = request.get_json()
+    plan_text = data.get("plan_text")
+    topics = data.get("topics", [])  # New: list of topics
+    level = data.get("level", "beginner")
+    style = data.get("style", "concise")
+
+    # Validate that either plan_text or topics is provided
+    if not plan_text and not topics:
+        return None, None, None, (jsonify({"error": "Missing required field: either 'plan_text' or 'topics' must be provided"}), 400)
+
+    # If plan_text is provided, parse it
+    if plan_text:
+        try:
+            # orjson caches repeated short keys, so the per-subtopic dicts share key strings
+            plan_dict = orjson.loads(plan_text)
+        except orjson.JSONDecodeError:
+            return None, None, None, (jsonify({"error": "Invalid JSON in plan_text"}), 400)
+    else:
+        # If only topics provided, create a simple plan dict
+        plan_dict = {
+            "topics": topics,
+            "topic": topics[0] if topics else "Untitled Topic"
+        }
+    return plan_dict, level, style, None
+
+
+def _ppt_filename(result):
+    # Get PPT file path if available (main functions use the key '_ppt_path')
+    ppt_filename = None
+    if result and isinstance(result, dict):
+        full_ppt_path = result.get("_ppt_path") or result.get("ppt_path")
+        if full_ppt_path:
+            try:
+                ppt_filename = Path(full_ppt_path).name
+            except Exception:
+                # Fallback to simple split
+                ppt_filename = str(full_ppt_path).split("/")[-1].split("\\")[-1]
+    return ppt_filename
+
+
 def run_pipeline_controller():
     try:
-        data = request.get_json()
-        plan_text = data.get("plan_text")
-        topics = data.get("topics", [])  # New: list of topics
-        level = data.get("level", "beginner")
-        style = data.get("style", "concise")
-
-        # Validate that either plan_text or topics is provided
-        if not plan_text and not topics:
-            return jsonify({"error": "Missing required field: either 'plan_text' or 'topics' must be provided"}), 400
-
-        # If plan_text is provided, parse it
-        if plan_text:
-            try:
-                plan_dict = json.loads(plan_text)
-            except json.JSONDecodeError:
-                return jsonify({"error": "Invalid JSON in plan_text"}), 400
-        else:
-            # If only topics provided, create a simple plan dict
-            plan_dict = {
-                "topics": topics,
-                "topic": topics[0] if topics else "Untitled Topic"
-            }
+        plan_dict, level, style, error = _parse_request()
+        if error is not None:
+            return error
 
         # Call main function with plan dict
         result = generate_content_from_plan(plan=plan_dict, level=level, style=style)
-
-        # Get PPT file path if available (main functions use the key '_ppt_path')
-        ppt_filename = None
-        if result and isinstance(result, dict):
-            full_ppt_path = result.get("_ppt_path") or result.get("ppt_path")
-            if full_ppt_path:
-                try:
-                    ppt_filename = Path(full_ppt_path).name
-                except Exception:
-                    # Fallback to simple split
-                    ppt_filename = str(full_ppt_path).split("/")[-1].split("\\")[-1]
+        ppt_filename = _ppt_filename(result)
 
         # Add ppt_filename to response
         response = {
@@ -51,4 +67,41 @@ def run_pipeline_controller():
         return jsonify(response), 200
 
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+
+def stream_pipeline_controller():
+    """
+    Same pipeline as run_pipeline_controller, streamed as NDJSON: one
+    {"section": name, "data": {...}} line per section as soon as it is generated,
+    then a final {"done": true, ...} (or {"error": ...}) line.
+    """
+    try:
+        plan_dict, level, style, error = _parse_request()
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    if error is not None:
+        return error
+
+    events = queue.Queue()
+
+    def _run():
+        try:
+            result = generate_content_from_plan(
+                plan=plan_dict, level=level, style=style,
+                on_section=lambda name, data: events.put({"section": name, "data": data}),
+            )
+            events.put({"done": True, "result": result, "ppt_filename": _ppt_filename(result)})
+        except Exception as e:
+            events.put({"error": str(e)})
+
+    threading.Thread(target=_run, daemon=True).start()
+
+    def _stream():
+        while True:
+            event = events.get()
+            yield orjson.dumps(event) + b"\n"
+            if "done" in event or "error" in event:
+                break
+
+    return Response(_stream(), mimetype="application/x-ndjson")
@@ -2,9 +2,11 @@
 Main orchestrator for article-based teaching content generation pipeline.
 """
 import os
-import json
+import orjson
 import time
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Dict, Any
 from urllib.parse import urlparse
@@ -27,15 +29,18 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-def _ensure_dirs():
-    Path(cfg.DATA_PATH).mkdir(parents=True, exist_ok=True)
-    (Path(cfg.DATA_PATH) / "outputs").mkdir(parents=True, exist_ok=True)
+@lru_cache(maxsize=1)
+def _ensure_dirs() -> Path:
+    # Created once per process; later calls skip the stat/mkdir syscalls
+    out_dir = Path(cfg.DATA_PATH) / "outputs"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    return out_dir
 
 
 def _save_json(obj: Dict[str, Any], path: Path):
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(obj, f, ensure_ascii=False, indent=2)
+    # Callers only write into the directory returned by _ensure_dirs().
+    option = orjson.OPT_INDENT_2 if cfg.PRETTY_JSON else 0
+    path.write_bytes(orjson.dumps(obj, option=option))
 
 
 def run_pipeline(
@@ -47,7 +52,14 @@ def run_pipeline(
 ):
     print(">>> Loading .env and prepping folders ...")
     load_dotenv()
-    _ensure_dirs()
+    out_dir = _ensure_dirs()
+
+    # Query generation depends only on plan_text, so start it now and let its Gemini
+    # latency overlap the extraction/embedding/upsert work below.
+    print(">>> Generating retrieval queries from plan (Gemini, background) ...")
+    query_pool = ThreadPoolExecutor(max_workers=1)
+    queries_future = query_pool.submit(generate_queries_from_plan, plan_text, n=8)
+    query_pool.shutdown(wait=False)
 
     # Determine final_k based on style
     if style == "concise":
@@ -97,11 +109,9 @@ def run_pipeline(
     )
     print(f"    upserted: {count} vectors into namespace: {namespace}")
 
-    out_dir = Path(cfg.DATA_PATH) / "outputs"
-
     # 5) Generate retrieval queries from your plan string (Gemini)
-    print(">>> Generating retrieval queries from plan (Gemini) ...")
-    queries = generate_queries_from_plan(plan_text, n=8)
+    print(">>> Waiting for retrieval queries ...")
+    queries = queries_future.result()
     print(f"    queries: {queries}")
     _save_json({"plan": plan_text, "queries": queries, "level": level, "style": style},
                out_dir / f"{url_hash}_plan_queries.json")
@@ -126,7 +136,7 @@ def run_pipeline(
         level=level,
         style=style,
         final_k=final_k,
-        max_context_chars=6000,
+        max_context_tokens=cfg.MAX_CONTEXT_TOKENS,
         model_name=getattr(cfg, "LLM_MODEL_NAME", "gemini-1.5-flash"),
     )
     
@@ -3,10 +3,12 @@ Main module for combined source teaching content generation pipeline.
 Supports YouTube videos, web articles, and file uploads.
 """
 from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Any
 import hashlib
-import json
+import orjson
 
 from dotenv import load_dotenv
 
@@ -27,17 +29,20 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-def _ensure_dirs():
+@lru_cache(maxsize=1)
+def _ensure_dirs() -> Path:
     """Ensure required directories exist."""
-    Path(cfg.DATA_PATH).mkdir(parents=True, exist_ok=True)
-    (Path(cfg.DATA_PATH) / "outputs").mkdir(parents=True, exist_ok=True)
+    # Created once per process; later calls skip the stat/mkdir syscalls
+    out_dir = Path(cfg.DATA_PATH) / "outputs"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    return out_dir
 
 
 def _save_json(obj: Dict[str, Any], path: Path):
     """Save JSON to file."""
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(obj, f, ensure_ascii=False, indent=2)
+    # Callers only write into the directory returned by _ensure_dirs().
+    option = orjson.OPT_INDENT_2 if cfg.PRETTY_JSON else 0
+    path.write_bytes(orjson.dumps(obj, option=option))
 
 
 def _extract_text_from_file_result(file_result: Dict[str, Any]) -> str:
@@ -96,7 +101,14 @@ def run_pipeline(
     """
     logger.info("Starting combined pipeline")
     load_dotenv()
-    _ensure_dirs()
+    out_dir = _ensure_dirs()
+
+    # Query generation depends only on plan_text, so start it now and let its Gemini
+    # latency overlap the source extraction/embedding/upsert work below.
+    logger.info("Generating retrieval queries (background)...")
+    query_pool = ThreadPoolExecutor(max_workers=1)
+    queries_future = query_pool.submit(generate_queries_from_plan, plan_text, n=8)
+    query_pool.shutdown(wait=False)
 
     # Determine final_k based on style
     if style == "concise":
@@ -132,11 +144,59 @@ def run_pipeline(
         "files": []
     }
 
+    # Transcript and article fetches are network-bound: start them all now so they
+    # run while the uploaded files are parsed (CPU-bound) on this thread.
+    fetch_pool = ThreadPoolExecutor(max_workers=4)
+    video_futures = [fetch_pool.submit(get_transcript_text, url) for url in video_urls]
+    article_futures = [fetch_pool.submit(get_article_text, url) for url in article_urls]
+    fetch_pool.shutdown(wait=False)
+
+    # Process uploaded files (their chunks go after the videos' and articles')
+    file_chunks = []
+    for idx, file_storage in enumerate(file_storages):
+        try:
+            logger.info(f"Processing file {idx + 1}/{len(file_storages)}: {file_storage.filename}")
+            # process_file_storage receives the FileStorage object directly
+            file_result = process_file_storage(file_storage)
+            
+            file_text = _extract_text_from_file_result(file_result)
+            
+            if file_text:
+                chunks = make_chunks(file_text)
+                file_chunks.extend(chunks)
+                
+                if isinstance(file_result, dict):
+                    file_metadata = file_result.get("metadata", {})
+                    extraction_method = file_result.get("extraction_method", "unknown")
+                    
+                    source_metadata["files"].append({
+                        "filename": file_storage.filename,
+                        "chunks": len(chunks),
+                        "extraction_method": extraction_method,
+                        "file_size": file_metadata.get("file_size", 0),
+                        "page_count": file_metadata.get("page_count", 0)
+                    })
+                else:
+                    source_metadata["files"].append({
+                        "filename": file_storage.filename,
+                        "chunks": len(chunks)
+                    })
+                
+                logger.info(f"  Added {len(chunks)} chunks from file")
+            else:
+                logger.warning(f"No text extracted from file {file_storage.filename}")
+                
+        except Exception as e:
+            # THIS IS LIKELY THE OTHER ISSUE: Check logs for this error
+            logger.error(f"Failed to process file {file_storage.filename}: {e}")
+            import traceback
+            logger.error(traceback.format_exc())
+
     # Process YouTube videos
     for idx, video_url in enumerate(video_urls):
         try:
             logger.info(f"Processing video {idx + 1}/{len(video_urls)}: {video_url}")
-            video_data = get_transcript_text(video_url)
+            video_data = video_futures[idx].result()
             transcript = video_data.get("transcript", "")
             
             if transcript:
@@ -156,7 +216,7 @@ def run_pipeline(
     for idx, article_url in enumerate(article_urls):
         try:
             logger.info(f"Processing article {idx + 1}/{len(article_urls)}: {article_url}")
-            article_data = get_article_text(article_url)
+            article_data = article_futures[idx].result()
             article_text = article_data.get("text", "")
             
             if isinstance(article_text, list):
@@ -174,45 +234,7 @@ def run_pipeline(
         except Exception as e:
             logger.error(f"Failed to process article {article_url}: {e}")
 
-    # Process uploaded files
-    for idx, file_storage in enumerate(file_storages):
-        try:
-            logger.info(f"Processing file {idx + 1}/{len(file_storages)}: {file_storage.filename}")
-            # process_file_storage receives the FileStorage object directly
-            file_result = process_file_storage(file_storage)
-            
-            file_text = _extract_text_from_file_result(file_result)
-            
-            if file_text:
-                chunks = make_chunks(file_text)
-                all_chunks.extend(chunks)
-                
-                if isinstance(file_result, dict):
-                    file_metadata = file_result.get("metadata", {})
-                    extraction_method = file_result.get("extraction_method", "unknown")
-                    
-                    source_metadata["files"].append({
-                        "filename": file_storage.filename,
-                        "chunks": len(chunks),
-                        "extraction_method": extraction_method,
-                        "file_size": file_metadata.get("file_size", 0),
-                        "page_count": file_metadata.get("page_count", 0)
-                    })
-                else:
-                    source_metadata["files"].append({
-                        "filename": file_storage.filename,
-                        "chunks": len(chunks)
-                    })
-                
-                logger.info(f"  Added {len(chunks)} chunks from file")
-            else:
-                logger.warning(f"No text extracted from file {file_storage.filename}")
-                
-        except Exception as e:
-            # THIS IS LIKELY THE OTHER ISSUE: Check logs for this error
-            logger.error(f"Failed to process file {file_storage.filename}: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
+    all_chunks.extend(file_chunks)
 
     if not all_chunks:
         # If all sources failed, this error will be raised.
@@ -235,9 +257,9 @@ def run_pipeline(
     )
     logger.info(f"Upserted {count} vectors")
 
-    # Generate retrieval queries
-    logger.info("Generating retrieval queries...")
-    queries = generate_queries_from_plan(plan_text, n=8)
+    # Collect the retrieval queries started at the top
+    logger.info("Waiting for retrieval queries...")
+    queries = queries_future.result()
     logger.info(f"Generated {len(queries)} queries")
 
     # Retrieve contexts
@@ -260,7 +282,7 @@ def run_pipeline(
         level=level,
         style=style,
         final_k=final_k,
-        max_context_chars=6000,
+        max_context_tokens=cfg.MAX_CONTEXT_TOKENS,
         model_name=getattr(cfg, "LLM_MODEL_NAME", "gemini-1.5-flash"),
     )
 
@@ -282,7 +304,6 @@ def run_pipeline(
     result["total_chunks"] = len(all_chunks)
 
     # Save results
-    out_dir = Path(cfg.DATA_PATH) / "outputs"
     out_file = out_dir / f"combined_{source_hash}_results.json"
     _save_json(result, out_file)
     logger.info(f"Results saved to {out_file}")
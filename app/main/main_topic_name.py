@@ -1,12 +1,20 @@
 from __future__ import annotations
-import json
 import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, Optional, Tuple
+
+import orjson
 
 # Assuming app.config and app.services.ppt_builder exist as in your original code
 import app.config as cfg
-from app.services.ppt_builder import build_ppt_from_result
+from app.services import content_cache
+from app.services.gemini import first_json_object, generate_with_retry, get_model
+from app.services.ppt_builder import build_ppt_from_result, ppt_filename_for
 
 try:
     import google.generativeai as genai
@@ -38,42 +46,70 @@ STYLE_GUIDELINES = {
     "exam-prep": "Focus on testable knowledge, exam topics."
 }
 
+# LEVEL/STYLE prompt lines for every known combination, built once at import.
+_GUIDE_BLOCKS = {
+    (lvl, sty): f"LEVEL: {lvl} ({lvl_guide})\nSTYLE: {sty} ({sty_guide})"
+    for lvl, lvl_guide in LEVEL_GUIDELINES.items()
+    for sty, sty_guide in STYLE_GUIDELINES.items()
+}
+
+
+def _guide_block(level: str, style: str) -> str:
+    block = _GUIDE_BLOCKS.get((level, style))
+    if block is None:
+        # Unknown values keep their label but fall back to the default guidance
+        level_guide = LEVEL_GUIDELINES.get(level, LEVEL_GUIDELINES["beginner"])
+        style_guide = STYLE_GUIDELINES.get(style, STYLE_GUIDELINES["concise"])
+        block = f"LEVEL: {level} ({level_guide})\nSTYLE: {style} ({style_guide})"
+    return block
+
+
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
 
 def _slugify(text: str) -> str:
     """Create a clean, URL-friendly slug from text."""
     text = (text or "").strip().lower()
-    text = re.sub(r"[^a-z0-9]+", "-", text)  # Replace non-alphanumeric with -
-    return re.sub(r"-+", "-", text).strip("-") or "untitled"
+    # Greedy '+' already collapses runs, so a single substitution suffices
+    return _NON_ALNUM_RE.sub("-", text).strip("-") or "untitled"
 
 
+@lru_cache(maxsize=1)
 def _ensure_output_dir() -> Path:
-    """Ensure the output directory exists and return it."""
+    """Ensure the output directory exists and return it (once per process)."""
     out_dir = Path(getattr(cfg, "DATA_PATH", "data/")) / "outputs"
     out_dir.mkdir(parents=True, exist_ok=True)
     return out_dir
 
 
+_JSON_FENCE_RE = re.compile(r"```(?:json)?\s*({.*})\s*```", re.DOTALL | re.IGNORECASE)
+
+
 def _extract_json_from_text(text: str) -> Dict[str, Any]:
     """
     Extract JSON from model output, handling markdown blocks and pre/post-amble text.
     """
-    # 1. Look for JSON inside a markdown code block
-    match = re.search(r'```(?:json)?\s*({.*})\s*```', text, re.DOTALL | re.IGNORECASE)
+    # 1. Calls run in JSON mode, so responses normally parse as-is
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        pass
+
+    # 2. Look for JSON inside a markdown code block
+    match = _JSON_FENCE_RE.search(text)
     
     if match:
         json_str = match.group(1)
     else:
-        # 2. If no markdown, find the first '{' and last '}'
-        start = text.find('{')
-        end = text.rfind('}')
-        if start == -1 or end == -1 or end < start:
+        # 3. If no markdown, take the first balanced {...} object
+        json_str = first_json_object(text)
+        if json_str is None:
             raise ValueError(f"Could not find valid JSON object in response. First 500 chars:\n{text[:500]}")
-        json_str = text[start : end + 1]
         
-    # 3. Try to parse the extracted string
+    # 4. Try to parse the extracted string
     try:
-        return json.loads(json_str)
-    except json.JSONDecodeError as e:
+        return orjson.loads(json_str)
+    except orjson.JSONDecodeError as e:
         print(f"     JSON parse failed: {e}")
         print(f"     Attempted to parse (first 500 chars): {json_str[:500]}...")
         raise ValueError("Failed to decode JSON from extracted string.") from e
@@ -91,6 +127,8 @@ def _call_gemini(model, prompt: str, part_name: str) -> str:
     config = genai.types.GenerationConfig(
         temperature=0.7,
         max_output_tokens=8192,  # Increased from 2048 to prevent truncated JSON
+        # JSON mode: responses parse directly, without markdown fences or preamble
+        response_mime_type="application/json",
     )
     
     safety = [
@@ -100,8 +138,10 @@ def _call_gemini(model, prompt: str, part_name: str) -> str:
     ]
     
     try:
-        response = model.generate_content(
+        response = generate_with_retry(
+            model,
             prompt,
+            part_name,
             generation_config=config,
             safety_settings=safety
         )
@@ -131,12 +171,9 @@ def _call_gemini(model, prompt: str, part_name: str) -> str:
         raise
 
 
-def _generate_notes(model, base_prompt: str, plan_json: str) -> Dict[str, Any]:
+def _generate_notes(model, shared_prefix: str) -> Dict[str, Any]:
     """Generate notes content."""
-    prompt = f"""{base_prompt}
-
-PLAN DETAILS:
-{plan_json}
+    prompt = f"""{shared_prefix}
 
 Generate educational notes as JSON:
 {{
@@ -159,12 +196,9 @@ Return ONLY the JSON, no other text."""
     return _extract_json_from_text(response_text)
 
 
-def _generate_summary(model, base_prompt: str, plan_json: str) -> Dict[str, Any]:
+def _generate_summary(model, shared_prefix: str) -> Dict[str, Any]:
     """Generate summary content."""
-    prompt = f"""{base_prompt}
-
-PLAN DETAILS:
-{plan_json}
+    prompt = f"""{shared_prefix}
 
 Generate a summary as JSON:
 {{
@@ -178,12 +212,9 @@ Return ONLY the JSON, no other text."""
     return _extract_json_from_text(response_text)
 
 
-def _generate_mcqs(model, base_prompt: str, plan_json: str, count: int) -> Dict[str, Any]:
+def _generate_mcqs(model, shared_prefix: str, count: int) -> Dict[str, Any]:
     """Generate MCQ content."""
-    prompt = f"""{base_prompt}
-
-PLAN DETAILS:
-{plan_json}
+    prompt = f"""{shared_prefix}
 
 Generate {count} multiple choice questions as JSON:
 {{
@@ -204,13 +235,131 @@ Return ONLY the JSON, no other text."""
     return _extract_json_from_text(response_text)
 
 
+def _generate_sections(
+    plan: Dict[str, Any],
+    topic: str,
+    level: str,
+    style: str,
+    language: str,
+    mcq_count: int,
+    model_name: str,
+    api_key: str,
+    on_section: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Run the three Gemini calls and return {"notes", "summary", "mcqs"}."""
+    model = get_model(model_name, api_key)
+
+    # Build base prompt
+    # FIX: Added SYSTEM_PROMPT back to the base_prompt string
+    base_prompt = f"""{SYSTEM_PROMPT}
+
+TOPIC: {topic}
+{_guide_block(level, style)}
+LANGUAGE: {language}"""
+
+    # The plan is serialized once, compactly, into a prefix shared verbatim by all
+    # three prompts so Gemini's implicit prefix caching can reuse it. Explicit
+    # CachedContent is not used: the static preamble is a few hundred tokens, far
+    # below the API's minimum cacheable size, and creating a cache per request would
+    # add a round trip instead of saving one.
+    plan_json = orjson.dumps(plan, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    shared_prefix = f"{base_prompt}\n\nPLAN DETAILS:\n{plan_json}"
+
+    # Generate content. The three sections are independent, so the calls run
+    # concurrently and the wall time is that of the slowest one.
+    # Sections are handed to on_section in completion order, not submission order.
+    sections: Dict[str, Any] = {}
+    try:
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            futures = {
+                pool.submit(_generate_notes, model, shared_prefix): "notes",
+                pool.submit(_generate_summary, model, shared_prefix): "summary",
+                pool.submit(_generate_mcqs, model, shared_prefix, mcq_count): "mcqs",
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                sections[name] = future.result()
+                if on_section is not None:
+                    on_section(name, sections[name])
+    except Exception as e:
+        print(f"\n!!! Content generation failed: {e}")
+        raise
+
+    return {"notes": sections["notes"], "summary": sections["summary"], "mcqs": sections["mcqs"]}
+
+
+# PPT rendering runs off the request thread. Pending builds are keyed by file name
+# so the download route can wait for one that has not finished yet. A failed build
+# leaves only its error message (for _PPT_ERROR_TTL_S seconds) so the route can
+# report why, not the future with its exception and result dict.
+_PPT_POOL = ThreadPoolExecutor(max_workers=4)
+_PENDING_PPTS: Dict[str, Future] = {}
+_PPT_ERRORS: Dict[str, Tuple[float, str]] = {}
+_PPT_ERROR_TTL_S = 600
+_PENDING_LOCK = threading.Lock()
+
+
+def _submit_ppt(result: Dict[str, Any], out_dir: Path) -> Path:
+    """Queue a PPT build for result into out_dir and return the path it will be saved to."""
+    filename = ppt_filename_for(result)
+    future = _PPT_POOL.submit(build_ppt_from_result, dict(result), output_dir=out_dir)
+    with _PENDING_LOCK:
+        _PENDING_PPTS[filename] = future
+        _PPT_ERRORS.pop(filename, None)
+
+    def _done(f: Future) -> None:
+        error = f.exception()
+        try:
+            if error is not None:
+                print(f"     PPT generation failed: {error}")
+            else:
+                print(f"     PPT saved -> {f.result()}")
+        finally:
+            now = time.time()
+            with _PENDING_LOCK:
+                if _PENDING_PPTS.get(filename) is f:
+                    del _PENDING_PPTS[filename]
+                    if error is not None:
+                        _PPT_ERRORS[filename] = (now, str(error))
+                for name in [n for n, (t, _) in _PPT_ERRORS.items() if now - t > _PPT_ERROR_TTL_S]:
+                    del _PPT_ERRORS[name]
+
+    future.add_done_callback(_done)
+    return out_dir / filename
+
+
+def wait_for_ppt(filename: str, timeout: Optional[float] = 120.0) -> None:
+    """
+    Block until a pending background build of filename finishes (no-op otherwise).
+
+    Raises if the build failed (within the last _PPT_ERROR_TTL_S seconds). Returns
+    on timeout, leaving the caller to report the file as not (yet) available.
+    """
+    with _PENDING_LOCK:
+        future = _PENDING_PPTS.get(filename)
+        failed = _PPT_ERRORS.get(filename)
+    if future is not None:
+        try:
+            future.result(timeout=timeout)
+        except FuturesTimeoutError:
+            pass
+    elif failed is not None:
+        raise RuntimeError(failed[1])
+
+
 def generate_content_from_plan(
     plan: Dict[str, Any],
     output_path: Optional[str] = None,
     level: str = "beginner",
-    style: str = "concise"
+    style: str = "concise",
+    on_section: Optional[Callable[[str, Dict[str, Any]], None]] = None,
 ) -> Dict[str, Any]:
-    """Generate educational content from a teacher plan using Gemini."""
+    """
+    Generate educational content from a teacher plan using Gemini.
+
+    on_section, if given, is called as on_section(name, data) for "notes",
+    "summary" and "mcqs" as soon as each one is ready.
+    """
     
     # Validate API key
     api_key = getattr(cfg, "GOOGLE_API_KEY", None)
@@ -226,35 +375,28 @@ def generate_content_from_plan(
     print(f">>> Generating content for: {topic}")
     print(f"     Level: {level}, Style: {style}, Language: {language}")
 
-    # Configure Gemini
-    genai.configure(api_key=api_key)
     model_name = getattr(cfg, "LLM_MODEL_NAME", "gemini-1.5-flash")
-    
-    # FIX: Removed the 'system_instruction' argument from here
-    model = genai.GenerativeModel(model_name) 
-
-    # Build base prompt
-    level_guide = LEVEL_GUIDELINES.get(level, LEVEL_GUIDELINES["beginner"])
-    style_guide = STYLE_GUIDELINES.get(style, STYLE_GUIDELINES["concise"])
-    
-    # FIX: Added SYSTEM_PROMPT back to the base_prompt string
-    base_prompt = f"""{SYSTEM_PROMPT}
-
-TOPIC: {topic}
-LEVEL: {level} ({level_guide})
-STYLE: {style} ({style_guide})
-LANGUAGE: {language}"""
-
-    plan_json = json.dumps(plan, ensure_ascii=False, indent=2)
+    out_dir = _ensure_output_dir()
 
-    # Generate content
-    try:
-        notes = _generate_notes(model, base_prompt, plan_json)
-        summary = _generate_summary(model, base_prompt, plan_json)
-        mcqs = _generate_mcqs(model, base_prompt, plan_json, mcq_count)
-    except Exception as e:
-        print(f"\n!!! Content generation failed: {e}")
-        raise
+    # Identical (plan, level, style, model) requests reuse the stored sections
+    # instead of re-issuing every Gemini call, so interrupted runs resume cheaply.
+    # CONTENT_CACHE_MAX_MB=0 turns the cache off.
+    use_cache = content_cache.cache_enabled()
+    cache_file = content_cache.cache_path(
+        {"plan": plan, "level": level, "style": style, "model": model_name}
+    )
+    sections = content_cache.load(cache_file) if use_cache else None
+    if sections is not None:
+        print(f"     Reusing cached content -> {cache_file}")
+        if on_section is not None:
+            for name in ("notes", "summary", "mcqs"):
+                on_section(name, sections[name])
+    else:
+        sections = _generate_sections(
+            plan, topic, level, style, language, mcq_count, model_name, api_key, on_section
+        )
+        if use_cache:
+            content_cache.store(cache_file, sections)
 
     # Build result
     result = {
@@ -263,29 +405,25 @@ LANGUAGE: {language}"""
         "level": level,
         "style": style,
         "language": language,
-        "notes": notes,
-        "summary": summary,
-        "mcqs": mcqs
+        "notes": sections["notes"],
+        "summary": sections["summary"],
+        "mcqs": sections["mcqs"]
     }
 
     # Save JSON
-    out_dir = _ensure_output_dir()
     out_file = Path(output_path) if output_path else (out_dir / f"{_slugify(topic)}_content.json")
     
-    with out_file.open("w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
-    
+    option = orjson.OPT_INDENT_2 if cfg.PRETTY_JSON else 0
+    out_file.write_bytes(orjson.dumps(result, option=option))
+
     print(f"     JSON saved -> {out_file}")
 
-    # Generate PPT
-    print(">>> Building PPT...")
-    try:
-        ppt_path = build_ppt_from_result(result)
-        print(f"     PPT saved -> {ppt_path}")
-        result["_ppt_path"] = str(ppt_path)
-    except Exception as e:
-        print(f"     PPT generation failed: {e}")
-        result["_ppt_path"] = None
+    # Generate PPT in the background; the download route waits for it if needed
+    print(">>> Building PPT (background)...")
+    result["_ppt_path"] = str(_submit_ppt(result, out_dir))
+    # Status when this response is sent; GET /download_ppt waits for the build
+    # and answers 500 with the error if it failed
+    result["ppt_status"] = "pending"
 
     result["_output_path"] = str(out_file)
     return result
\ No newline at end of file
@@ -1,33 +1,27 @@
 from __future__ import annotations
-import os
-import json
+import orjson
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Dict, Any
 
 from dotenv import load_dotenv
 
-from app.services.youtube import get_transcript_text
-from app.services.chunker import make_chunks
-from app.services.embeddings import embed_chunks
-from app.services.pinecone_index import ensure_index, upsert_chunks
-from app.services.generate_queries import generate_queries_from_plan
-from app.services.retriever import retrieve_from_queries
-from app.services.generator import generate_all
-from app.services.ppt_builder import build_ppt_from_result
-
-
 import app.config as cfg
 
-def _ensure_dirs():
-    Path(cfg.DATA_PATH).mkdir(parents=True, exist_ok=True)
-    (Path(cfg.DATA_PATH) / "outputs").mkdir(parents=True, exist_ok=True)
+@lru_cache(maxsize=1)
+def _ensure_dirs() -> Path:
+    # Created once per process; later calls skip the stat/mkdir syscalls
+    out_dir = Path(cfg.DATA_PATH) / "outputs"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    return out_dir
 
 
 def _save_json(obj: Dict[str, Any], path: Path):
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(obj, f, ensure_ascii=False, indent=2)
+    # Callers only write into the directory returned by _ensure_dirs().
+    option = orjson.OPT_INDENT_2 if cfg.PRETTY_JSON else 0
+    path.write_bytes(orjson.dumps(obj, option=option))
 
 
 def run_pipeline(
@@ -37,9 +31,26 @@ def run_pipeline(
     level: str,
     style: str,
 ):
+    # Heavy dependencies (langchain, tiktoken, the Gemini SDK, sentence-transformers,
+    # pinecone, python-pptx) are imported on first use so importing this module stays cheap.
+    from app.services.youtube import get_transcript_text
+    from app.services.chunker import make_chunks
+    from app.services.generate_queries import generate_queries_from_plan
+    from app.services.embeddings import embed_chunks
+    from app.services.pinecone_index import ensure_index, upsert_chunks
+    from app.services.generator import generate_all
+    from app.services.ppt_builder import build_ppt_from_result
+
     print(">>> Loading .env and prepping folders ...")
     load_dotenv()
-    _ensure_dirs()
+    out_dir = _ensure_dirs()
+
+    # Query generation depends only on plan_text, so start it now and let its Gemini
+    # latency overlap the transcript/embedding/upsert work below.
+    print(">>> Generating retrieval queries from plan (Gemini, background) ...")
+    query_pool = ThreadPoolExecutor(max_workers=1)
+    queries_future = query_pool.submit(generate_queries_from_plan, plan_text, n=8)
+    query_pool.shutdown(wait=False)
 
     # Determine final_k based on style
     if style == "concise":
@@ -86,11 +97,10 @@ def run_pipeline(
     print(f"    upserted: {count} vectors into namespace: {namespace}")
 
 
-    out_dir = Path(cfg.DATA_PATH) / "outputs"
 
-    # 6) Generate retrieval queries from your plan string (Gemini)
-    print(">>> Generating retrieval queries from plan (Gemini) ...")
-    queries = generate_queries_from_plan(plan_text, n=8)
+    # 6) Collect the retrieval queries started at the top
+    print(">>> Waiting for retrieval queries ...")
+    queries = queries_future.result()
     print(f"    queries: {queries}")
     _save_json({"plan": plan_text, "queries": queries, "level": level, "style": style},
                out_dir / f"{video_id}_plan_queries.json")
@@ -104,7 +114,7 @@ def run_pipeline(
         level=level,
         style=style,
         final_k=final_k,
-        max_context_chars=6000,
+        max_context_tokens=cfg.MAX_CONTEXT_TOKENS,
         model_name=getattr(cfg, "LLM_MODEL_NAME", "gemini-1.5-flash"),
     )
     
@@ -0,0 +1,16 @@
+"""
+Routes for bulk generation over content that has already been ingested.
+"""
+from flask import Blueprint
+
+batch_bp = Blueprint("batch", __name__)
+
+@batch_bp.route("/generate", methods=["POST"])
+def batch_generate_route():
+    """
+    POST /api/batch/generate
+    Queue notes/summary/MCQ generation for many topics; returns 202 with a job_id
+    to poll at /api/jobs/<job_id>.
+    """
+    from app.controllers.batch_controller import submit_batch_controller
+    return submit_batch_controller()
@@ -1,6 +1,23 @@
 """Helper functions for PPT downloads across routes."""
 from pathlib import Path
-from flask import send_from_directory, jsonify
+from flask import current_app, send_file, jsonify
+
+# Resolved once at import; every download is checked against this root.
+OUTPUTS_DIR = (Path("data") / "outputs").resolve()
+
+
+def safe_join(base: Path, rel: str) -> Path:
+    """
+    Join rel onto base and refuse anything that resolves outside base.
+
+    Uses a path-component check rather than a string prefix, so a sibling such
+    as "data/outputs-evil" is not mistaken for a child of "data/outputs".
+    """
+    target = (base / rel).resolve()
+    if not target.is_relative_to(base):
+        raise ValueError(f"Path escapes {base}: {rel}")
+    return target
+
 
 def handle_ppt_download(filename: str) -> tuple:
     """
@@ -12,33 +29,30 @@ def handle_ppt_download(filename: str) -> tuple:
     Returns:
         tuple: Flask response and status code
     """
-    outputs_dir = Path("data") / "outputs"
-    outputs_dir = outputs_dir.resolve()
+    outputs_dir = OUTPUTS_DIR
     
     try:
-        # Prevent path traversal by resolving and checking parent
-        target = (outputs_dir / filename).resolve()
-        if not str(target).startswith(str(outputs_dir)):
+        # Prevent path traversal
+        try:
+            target = safe_join(outputs_dir, filename)
+        except ValueError:
             return jsonify({"error": "Invalid filename"}), 400
 
         if not target.exists():
-            # Helpful debug: list available files
-            try:
-                available = [p.name for p in outputs_dir.iterdir() if p.is_file()]
-            except Exception:
-                available = []
-            return jsonify({
-                "error": "File not found", 
-                "requested": filename, 
-                "available": available
-            }), 404
-
-        # Use send_from_directory which handles file serving and headers
-        return send_from_directory(
-            directory=str(outputs_dir),
-            path=filename,
-            as_attachment=True
-        )
+            body = {"error": "File not found", "requested": filename}
+            # Helpful debug: list available files. Skipped in production, where the
+            # outputs dir can hold thousands of files and this runs on every 404.
+            if current_app.debug:
+                try:
+                    body["available"] = [p.name for p in outputs_dir.iterdir() if p.is_file()]
+                except Exception:
+                    body["available"] = []
+            return jsonify(body), 404
+
+        # target is already validated, so send it directly. conditional=True lets
+        # repeat downloads short-circuit to 304 via ETag / If-Modified-Since, and
+        # send_file honours app.use_x_sendfile when a fronting proxy serves the bytes.
+        return send_file(target, as_attachment=True, conditional=True)
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
\ No newline at end of file
@@ -0,0 +1,18 @@
+"""
+Routes for polling background pipeline jobs.
+"""
+from flask import Blueprint, jsonify
+
+jobs_bp = Blueprint("jobs", __name__)
+
+@jobs_bp.route("/<job_id>", methods=["GET"])
+def job_status(job_id):
+    """
+    GET /api/jobs/<job_id>
+    Returns {"job_id", "status": queued|running|done|failed, "result" | "error"}.
+    """
+    from app.services import jobs
+    record = jobs.get(job_id)
+    if record is None:
+        return jsonify({"error": "Unknown job id"}), 404
+    return jsonify(record), 200
@@ -1,7 +1,10 @@
 from flask import Blueprint
-from app.controllers.plan_controller import generate_plan_controller
 
 plan_bp = Blueprint("plan_bp", __name__)
 
 # POST /api/plan/generate
-plan_bp.route("/generate", methods=["POST"])(generate_plan_controller)
+@plan_bp.route("/generate", methods=["POST"])
+def generate_plan_route():
+    from app.controllers.plan_controller import generate_plan_controller
+    return generate_plan_controller()
+
@@ -3,34 +3,159 @@ import sys
 # Add parent directory to path for imports to work
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from flask import Flask
-from app.routes.plan_routes import plan_bp
-from app.routes.yt_pipeline_routes import yt_pipeline
-from flask_cors import CORS
+import importlib
+import json
+from pathlib import PurePath
+
+import orjson
+from flask import Flask, request
+from flask.json.provider import JSONProvider
 from dotenv import load_dotenv
-from app.routes.article_pipeline_routes import article_pipeline
-from app.routes.topic_name_routes import topic_name_pipeline
-from app.routes.file_upload_routes import file_upload_bp
-from app.routes.combined_routes import combined_pipeline
 
-load_dotenv()
+# Register blueprints (routes). The route modules are thin: each view imports its
+# controller (and with it Gemini, docling, pinecone, ...) on first request, so
+# server start-up does not pay for pipelines that are never called.
+BLUEPRINTS = [
+    ("app.routes.plan_routes", "plan_bp", "/api/plan"),
+    ("app.routes.yt_pipeline_routes", "yt_pipeline", "/api/yt_pipeline"),
+    ("app.routes.article_pipeline_routes", "article_pipeline", "/api/article_pipeline"),
+    ("app.routes.topic_name_routes", "topic_name_pipeline", "/api/topic_pipeline"),
+    ("app.routes.file_upload_routes", "file_upload_bp", "/api/file_upload"),
+    ("app.routes.combined_routes", "combined_pipeline", "/api/combined_pipeline"),
+    ("app.routes.jobs_routes", "jobs_bp", "/api/jobs"),
+    ("app.routes.batch_routes", "batch_bp", "/api/batch"),
+]
+
+# Load balancers and uptime monitors hit /health constantly. Answer those probes
+# with a pre-built body at the WSGI layer, before Flask builds a request context,
+# matches routes or runs the CORS hooks. Cross-origin probes (with an Origin header)
+# still go through Flask so they get CORS headers; the view below also serves HEAD.
+_HEALTH_BODY = b'{"message":"Backend is running","status":"healthy"}'
+_HEALTH_HEADERS = [
+    ("Content-Type", "application/json"),
+    ("Content-Length", str(len(_HEALTH_BODY))),
+]
+
+
+def _health_short_circuit(wsgi_app):
+    def middleware(environ, start_response):
+        if (
+            environ.get("PATH_INFO") == "/health"
+            and environ.get("REQUEST_METHOD") == "GET"
+            and "HTTP_ORIGIN" not in environ
+        ):
+            start_response("200 OK", list(_HEALTH_HEADERS))
+            return [_HEALTH_BODY]
+        return wsgi_app(environ, start_response)
+    return middleware
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    jsonify / request.get_json through orjson. Pipeline responses carry the full
+    notes, summary and MCQs, so serialization cost is not negligible. Keys keep
+    their insertion order instead of being sorted.
+    """
+
+    @staticmethod
+    def _default(o):
+        # orjson handles datetimes natively; paths are the only other type routes
+        # return. Anything else is a bug and should fail loudly, like stdlib json.
+        if isinstance(o, PurePath):
+            return str(o)
+        raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+    def dumps(self, obj, **kwargs) -> str:
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.pop("sort_keys", False):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.pop("indent", None):
+            option |= orjson.OPT_INDENT_2
+        default = kwargs.pop("default", self._default)
+        if kwargs:
+            # Options orjson has no equivalent for (separators, ensure_ascii, ...)
+            return json.dumps(obj, default=default, **kwargs)
+        return orjson.dumps(obj, option=option, default=default).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+def _install_cors(app: Flask) -> None:
+    """
+    Minimal CORS: answer every preflight directly and stamp the headers on
+    responses. Replaces Flask-CORS, whose per-request resource matching the API
+    does not need (every route shares one policy).
+    """
+    origins = [o.strip() for o in os.environ.get("CORS_ORIGINS", "*").split(",") if o.strip()]
+    allow_any = "*" in origins
+    allowed = frozenset(origins)
+    # Browsers cache the preflight for CORS_MAX_AGE seconds (default 24h) instead of
+    # sending an OPTIONS round trip before every pipeline POST.
+    preflight_headers = {
+        "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
+        "Access-Control-Allow-Headers": "Content-Type, Authorization",
+        "Access-Control-Max-Age": os.environ.get("CORS_MAX_AGE", "86400"),
+    }
+
+    def _allow_origin_headers(origin):
+        if allow_any:
+            return {"Access-Control-Allow-Origin": "*"}
+        if origin in allowed:
+            return {"Access-Control-Allow-Origin": origin, "Vary": "Origin"}
+        return {}
+
+    @app.before_request
+    def _cors_preflight():
+        if request.method == "OPTIONS" and "Access-Control-Request-Method" in request.headers:
+            headers = _allow_origin_headers(request.headers.get("Origin"))
+            if headers:
+                headers.update(preflight_headers)
+                # Echo the requested headers, as Flask-CORS did, so clients
+                # sending custom headers are not rejected by the preflight.
+                requested = request.headers.get("Access-Control-Request-Headers")
+                if requested:
+                    headers["Access-Control-Allow-Headers"] = requested
+            return "", 204, headers
+
+    @app.after_request
+    def _cors_headers(response):
+        origin = request.headers.get("Origin")
+        if origin and request.method != "OPTIONS":
+            response.headers.update(_allow_origin_headers(origin))
+        return response
+
+
+def create_app(blueprints=None) -> Flask:
+    """
+    Build the API application.
+
+    blueprints: subset of BLUEPRINTS to register (default: all of them).
+    """
+    load_dotenv()
+
+    app = Flask(__name__)
+    app.json = OrjsonProvider(app)
+    # Behind a proxy that understands X-Sendfile, downloads are handed to the proxy
+    # instead of being streamed through the Python worker.
+    app.use_x_sendfile = os.environ.get("USE_X_SENDFILE", "").lower() in ("1", "true", "yes")
+
+    _install_cors(app)
+
+    for module_name, attr, prefix in (BLUEPRINTS if blueprints is None else blueprints):
+        app.register_blueprint(getattr(importlib.import_module(module_name), attr), url_prefix=prefix)
 
-app = Flask(__name__)
+    @app.route("/", methods=["GET"])
+    def home():
+        return {"message": "🚀 Teaching Content Generator API Running", "status": "healthy"}
 
-CORS(app) 
+    @app.route("/health", methods=["GET"])
+    def health():
+        return {"status": "healthy", "message": "Backend is running"}, 200
 
-# Register blueprints (routes)
-app.register_blueprint(plan_bp, url_prefix="/api/plan")
-app.register_blueprint(yt_pipeline, url_prefix="/api/yt_pipeline")
-app.register_blueprint(article_pipeline, url_prefix="/api/article_pipeline")
-app.register_blueprint(topic_name_pipeline, url_prefix="/api/topic_pipeline")
-app.register_blueprint(file_upload_bp, url_prefix="/api/file_upload")
-app.register_blueprint(combined_pipeline, url_prefix="/api/combined_pipeline")
+    app.wsgi_app = _health_short_circuit(app.wsgi_app)
+    return app
 
-@app.route("/", methods=["GET"])
-def home():
-    return {"message": "🚀 Teaching Content Generator API Running", "status": "healthy"}
 
-@app.route("/health", methods=["GET"])
-def health():
-    return {"status": "healthy", "message": "Backend is running"}, 200
\ No newline at end of file
+# Single WSGI entry point: `flask --app app.server run` / `gunicorn app.server:app`
+app = create_app()
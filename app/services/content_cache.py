@@ -0,0 +1,181 @@
+"""
+On-disk, content-addressed cache for generated content.
+
+Entries live under data/cache/entries/<2 hex>/<sha256>.json and are evicted
+least-recently-used once the cache exceeds CONTENT_CACHE_MAX_MB. The cache sits
+outside data/outputs so it is never served as a download.
+
+A semantic index (data/cache/semantic/) maps request embeddings to entries, so
+a near-identical request within the same scope can reuse one. It is small,
+capped per scope, and never evicted by size.
+
+Fetched sources (transcripts, articles) share the store through
+store_stamped / load_fresh, which also expire an entry by age.
+"""
+from __future__ import annotations
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import orjson
+
+import app.config as cfg
+
+# Running size of the entries written by this process, so store() does not have
+# to stat the whole cache on every write. Re-synced from disk by _evict when it
+# passes the cap, and at least every _RESCAN_INTERVAL_S to pick up other
+# workers' writes.
+_RESCAN_INTERVAL_S = 300
+# Eviction goes down to this fraction of the cap, so a full cache is not
+# rescanned again on the very next write.
+_EVICT_TO = 0.9
+_SIZE_LOCK = threading.Lock()
+_size_total: Optional[int] = None
+_last_scan = 0.0
+
+
+def _cache_root() -> Path:
+    return Path(cfg.DATA_PATH) / "cache"
+
+
+def _entries_root() -> Path:
+    return _cache_root() / "entries"
+
+
+def cache_enabled() -> bool:
+    """CONTENT_CACHE_MAX_MB=0 turns the cache off."""
+    return cfg.CONTENT_CACHE_MAX_MB > 0
+
+
+def cache_path(key_fields: Dict[str, Any]) -> Path:
+    """Content-addressed location for the entry described by key_fields."""
+    payload = orjson.dumps(key_fields, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    key = hashlib.sha256(payload).hexdigest()
+    # Shard by the first two hex digits so no single directory grows unbounded
+    return _entries_root() / key[:2] / f"{key}.json"
+
+
+def load(path: Path) -> Optional[Any]:
+    try:
+        data = orjson.loads(path.read_bytes())
+        os.utime(path)  # mark as recently used for LRU eviction
+        return data
+    except (OSError, orjson.JSONDecodeError):
+        return None
+
+
+def store(path: Path, value: Any) -> None:
+    """Write via a temp file + os.replace so an interrupted run never leaves a partial entry."""
+    global _size_total
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = orjson.dumps(value)
+    try:
+        replaced = path.stat().st_size
+    except OSError:
+        replaced = 0
+    tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+    max_bytes = cfg.CONTENT_CACHE_MAX_MB * 1024 * 1024
+    with _SIZE_LOCK:
+        if _size_total is not None:
+            _size_total += len(data) - replaced
+        if _size_total is None or _size_total > max_bytes or time.time() - _last_scan > _RESCAN_INTERVAL_S:
+            _evict(_entries_root(), max_bytes)
+
+
+def load_fresh(path: Path, max_age: float) -> Optional[Any]:
+    """load() for an entry written by store_stamped, or None once it is older than max_age seconds."""
+    entry = load(path)
+    if not isinstance(entry, dict) or time.time() - entry.get("stored_at", 0) > max_age:
+        return None
+    return entry.get("value")
+
+
+def store_stamped(path: Path, value: Any) -> None:
+    """store() with the write time recorded, for entries read back through load_fresh."""
+    store(path, {"stored_at": time.time(), "value": value})
+
+
+def _evict(entries_root: Path, max_bytes: int) -> None:
+    """
+    Rescan the entries on disk, resetting the running size. If they exceed
+    max_bytes, delete least-recently-used ones until they fit in _EVICT_TO of
+    it. Called with _SIZE_LOCK held.
+    """
+    global _size_total, _last_scan
+    entries = []
+    total = 0
+    for p in entries_root.glob("*/*.json"):
+        try:
+            st = p.stat()
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, p))
+        total += st.st_size
+    _last_scan = time.time()
+    if total > max_bytes:
+        target = int(max_bytes * _EVICT_TO)
+        entries.sort(key=lambda e: e[0])
+        for _, size, p in entries:
+            try:
+                p.unlink()
+            except OSError:
+                continue
+            total -= size
+            if total <= target:
+                break
+    _size_total = total
+
+
+# Newest entries kept per semantic scope; older ones drop off the index.
+SEMANTIC_MAX_ENTRIES = 64
+
+
+def _semantic_index_path(scope: Dict[str, Any]) -> Path:
+    payload = orjson.dumps(scope, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    key = hashlib.sha256(payload).hexdigest()
+    return _cache_root() / "semantic" / f"{key}.json"
+
+
+def _read_index(path: Path) -> List[Dict[str, Any]]:
+    try:
+        return orjson.loads(path.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        return []
+
+
+def semantic_lookup(scope: Dict[str, Any], vector: Sequence[float], threshold: float) -> Optional[Any]:
+    """
+    Return the cached value whose request embedding is most similar to vector,
+    if its cosine similarity is at least threshold. Only entries added under the
+    same scope (e.g. namespace + level + style + model) are considered.
+    """
+    entries = _read_index(_semantic_index_path(scope))
+    if not entries:
+        return None
+    matrix = np.asarray([e["v"] for e in entries], dtype=np.float32)
+    probe = np.asarray(vector, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(probe) or 1.0)
+    sims = matrix @ probe / np.where(norms == 0, 1.0, norms)
+    best = int(np.argmax(sims))
+    if sims[best] < threshold:
+        return None
+    # The entry may have been evicted since it was indexed; load() then returns None
+    return load(Path(entries[best]["entry"]))
+
+
+def semantic_add(scope: Dict[str, Any], vector: Sequence[float], entry: Path) -> None:
+    """Index entry (a path returned by cache_path) under vector for semantic_lookup."""
+    path = _semantic_index_path(scope)
+    entries = _read_index(path)
+    entries.append({"v": [float(x) for x in vector], "entry": str(entry)})
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(orjson.dumps(entries[-SEMANTIC_MAX_ENTRIES:]))
+    os.replace(tmp, path)
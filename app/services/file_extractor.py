@@ -3,12 +3,21 @@ File extractor service.
 """
 from datetime import datetime
 from pathlib import Path
+from typing import BinaryIO, Union
+import io
 import os
+import shutil
 import tempfile
+import threading
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Uploads up to this size are parsed from memory when Docling is not in use.
+IN_MEMORY_MAX_BYTES = 10 * 1024 * 1024
+# Copy chunk for spilling uploads to disk (FileStorage.save uses 16 KiB).
+_COPY_BUFSIZE = 1024 * 1024
+
 # Try importing Docling
 try:
     from docling.document_converter import DocumentConverter
@@ -29,20 +38,28 @@ def process_file_storage(file_storage):
         "pages": [{"page_number": 1, "text": "...", "success": True}, ...]
     }
     """
-    # CRITICAL FIX: Reset file pointer to beginning
-    file_storage.seek(0)
+    # Measure the upload without reading it; this also resets the file pointer
+    stream = file_storage.stream
+    stream.seek(0, os.SEEK_END)
+    file_size = stream.tell()
+    stream.seek(0)
     
     filename = file_storage.filename
+    suffix = Path(filename).suffix.lower()  # computed once, reused for the temp file and dispatch
     logger.info(f"Processing uploaded file: {filename}")
     
-    # Save to temp file
-    with tempfile.NamedTemporaryFile(delete=False, suffix=Path(filename).suffix) as tmp:
-        file_storage.save(tmp.name)
-        tmp_path = Path(tmp.name)
+    # Large uploads should not sit in memory, so only those go through a temp file;
+    # small files are read once and every parser (Docling included) works on that buffer.
+    tmp_path = None
+    buffer = None
+    if file_size > IN_MEMORY_MAX_BYTES:
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+            shutil.copyfileobj(stream, tmp, _COPY_BUFSIZE)
+            tmp_path = Path(tmp.name)
+    else:
+        buffer = io.BytesIO(stream.read())
     
     try:
-        file_size = tmp_path.stat().st_size
-        
         # Try Docling first if available
         pages = None
         method = None
@@ -51,7 +68,7 @@ def process_file_storage(file_storage):
         if DOCLING_AVAILABLE:
             try:
                 logger.info("Attempting Docling extraction...")
-                pages = _extract_with_docling(tmp_path)
+                pages = _extract_with_docling(tmp_path if tmp_path is not None else buffer, filename)
                 method = "docling"
                 logger.info("Docling extraction successful")
             except Exception as e:
@@ -61,7 +78,9 @@ def process_file_storage(file_storage):
         # Fallback if Docling failed or unavailable
         if pages is None:
             logger.info("Using fallback extraction methods")
-            pages = _fallback_extract(tmp_path)
+            if buffer is not None:
+                buffer.seek(0)  # Docling may have consumed it
+            pages = _fallback_extract(tmp_path if tmp_path is not None else buffer, suffix)
             method = "fallback"
         
         # Build result
@@ -81,30 +100,98 @@ def process_file_storage(file_storage):
         
     finally:
         # Cleanup temp file
-        try:
-            os.unlink(tmp_path)
-        except Exception as e:
-            logger.warning(f"Failed to delete temp file {tmp_path}: {e}")
+        if tmp_path is not None:
+            try:
+                os.unlink(tmp_path)
+            except Exception as e:
+                logger.warning(f"Failed to delete temp file {tmp_path}: {e}")
 
 
-def _extract_with_docling(file_path: Path):
+_converter = None
+_CONVERTER_LOCK = threading.Lock()
+# Docling does not document convert() as thread-safe, so uploads handled on
+# different threads take turns on the one converter.
+_CONVERT_LOCK = threading.Lock()
+
+
+def _get_converter():
+    """
+    The process-wide DocumentConverter, built on first use. Construction loads
+    fonts and layout/OCR models, so it happens once per process rather than per
+    upload or per thread.
+    """
+    global _converter
+    with _CONVERTER_LOCK:
+        if _converter is None:
+            _converter = DocumentConverter()
+        return _converter
+
+
+# PDFs longer than this are converted by Docling one page window at a time, so
+# only that window's parsed pages are held in memory.
+DOCLING_PAGE_WINDOW = 16
+
+
+def _pdf_page_count(source: Union[Path, BinaryIO]):
+    """Page count via pypdfium2 (a Docling dependency), or None if unavailable."""
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        return None
+    pdf = pdfium.PdfDocument(source)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+        if not isinstance(source, Path):
+            source.seek(0)
+
+
+def _extract_with_docling_stream(source: Union[Path, BinaryIO], filename: str):
+    """
+    Yield page dicts from Docling. source is a file path or an in-memory binary
+    stream (named after filename, which Docling uses to detect the format).
+    """
+    converter = _get_converter()
+
+    def convert(page_range=None):
+        kwargs = {} if page_range is None else {"page_range": page_range}
+        if isinstance(source, Path):
+            with _CONVERT_LOCK:
+                return converter.convert(str(source), **kwargs)
+        from docling.datamodel.base_models import DocumentStream
+        source.seek(0)
+        with _CONVERT_LOCK:
+            return converter.convert(DocumentStream(name=Path(filename).name, stream=source), **kwargs)
+
+    n_pages = _pdf_page_count(source) if Path(filename).suffix.lower() == ".pdf" else None
+    if not n_pages or n_pages <= DOCLING_PAGE_WINDOW:
+        windows = [None]
+    else:
+        windows = [
+            (start, min(start + DOCLING_PAGE_WINDOW - 1, n_pages))
+            for start in range(1, n_pages + 1, DOCLING_PAGE_WINDOW)
+        ]
+
+    for window in windows:
+        document = convert(window).document
+        # document.pages maps page number -> PageItem; the text lives on the document
+        for page_no in sorted(document.pages):
+            yield {
+                "page_number": page_no,
+                "text": document.export_to_markdown(page_no=page_no),
+                "success": True
+            }
+        del document
+
+
+def _extract_with_docling(source: Union[Path, BinaryIO], filename: str):
     """
     Extract using Docling.
     Returns list of page dicts.
     """
     try:
-        converter = DocumentConverter()
-        result = converter.convert(str(file_path))
-        
-        pages = []
-        if hasattr(result, 'document') and hasattr(result.document, 'pages'):
-            for i, page in enumerate(result.document.pages, 1):
-                text = page.export_to_markdown() if hasattr(page, 'export_to_markdown') else str(page)
-                pages.append({
-                    "page_number": i,
-                    "text": text,
-                    "success": True
-                })
+        pages = list(_extract_with_docling_stream(source, filename))
         
         if not pages:
             raise RuntimeError("Docling returned no pages")
@@ -116,23 +203,23 @@ def _extract_with_docling(file_path: Path):
         raise
 
 
-def _fallback_extract(file_path: Path):
+def _fallback_extract(source: Union[Path, BinaryIO], suffix: str):
     """
     Fallback extraction using PyPDF2, python-docx, Pillow, etc.
+    source is a file path or an in-memory binary stream; suffix is lower-case.
     Returns list of page dicts.
     """
     pages = []
-    suffix = file_path.suffix.lower()
     
     try:
         if suffix == ".pdf":
-            pages = _extract_pdf_fallback(file_path)
+            pages = _extract_pdf_fallback(source)
         elif suffix in [".docx", ".doc"]:
-            pages = _extract_docx_fallback(file_path)
+            pages = _extract_docx_fallback(source)
         elif suffix == ".txt":
-            pages = _extract_txt(file_path)
+            pages = _extract_txt(source)
         elif suffix in [".png", ".jpg", ".jpeg", ".tiff", ".bmp"]:
-            pages = _extract_image_ocr(file_path)
+            pages = _extract_image_ocr(source)
         else:
             raise ValueError(f"Unsupported file type: {suffix}")
             
@@ -151,45 +238,147 @@ def _fallback_extract(file_path: Path):
     return pages
 
 
-def _extract_pdf_fallback(file_path: Path):
-    """Extract PDF using PyPDF2."""
-    try:
-        import PyPDF2
-    except ImportError:
-        raise ImportError("PyPDF2 not installed. Install with: pip install PyPDF2")
-    
+# PDFs with at least this many pages are split across worker processes. PyPDF2 is
+# pure Python, so threads would serialize on the GIL. PDF_EXTRACT_WORKERS sets the
+# pool size (1 disables the split).
+PDF_PARALLEL_MIN_PAGES = 32
+_PDF_WORKERS = max(1, int(os.environ.get("PDF_EXTRACT_WORKERS", min(4, os.cpu_count() or 1))))
+# Each worker gets at least this many pages, so its share outweighs the cost of
+# pickling the PDF bytes to it and re-parsing the document there.
+_PDF_MIN_PAGES_PER_WORKER = 16
+_pdf_pool = None
+_PDF_POOL_LOCK = threading.Lock()
+
+
+def _get_pdf_pool():
+    """Process pool for page extraction, created on first large PDF and reused."""
+    global _pdf_pool
+    # Locked so concurrent large uploads cannot each start (and leak) a pool
+    with _PDF_POOL_LOCK:
+        if _pdf_pool is None:
+            from concurrent.futures import ProcessPoolExecutor
+            import multiprocessing
+            # spawn: forking a multi-threaded server process is not safe
+            _pdf_pool = ProcessPoolExecutor(
+                max_workers=_PDF_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pdf_pool
+
+
+def _choose_pdf_workers(page_count: int) -> int:
+    """How many processes to split a PDF across; 1 means extract in-process."""
+    if page_count < PDF_PARALLEL_MIN_PAGES:
+        return 1
+    return max(1, min(_PDF_WORKERS, page_count // _PDF_MIN_PAGES_PER_WORKER))
+
+
+def _extract_pdf_pages(reader, start: int, stop: int):
+    pages = []
+    for i in range(start, stop):
+        try:
+            text = reader.pages[i].extract_text() or ""
+            pages.append({
+                "page_number": i + 1,
+                "text": text,
+                "success": True
+            })
+        except Exception as e:
+            logger.error(f"Failed to extract page {i + 1}: {e}")
+            pages.append({
+                "page_number": i + 1,
+                "text": "",
+                "success": False,
+                "error": str(e)
+            })
+    return pages
+
+
+def _extract_pdf_range(data: bytes, start: int, stop: int):
+    """Worker entry point: parse the PDF bytes and extract pages [start, stop)."""
+    import PyPDF2
+    return _extract_pdf_pages(PyPDF2.PdfReader(io.BytesIO(data)), start, stop)
+
+
+def _extract_pdf_pdfium(source: Union[Path, BinaryIO]):
+    """Extract PDF text with pypdfium2 (PDFium, C++): much faster than PyPDF2."""
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(source if isinstance(source, Path) else source.read())
     pages = []
-    with open(file_path, "rb") as f:
-        reader = PyPDF2.PdfReader(f)
-        for i, page in enumerate(reader.pages, 1):
+    try:
+        for i in range(len(pdf)):
             try:
-                text = page.extract_text() or ""
+                page = pdf[i]
+                textpage = page.get_textpage()
+                text = textpage.get_text_range()
+                textpage.close()
+                page.close()
                 pages.append({
-                    "page_number": i,
+                    "page_number": i + 1,
                     "text": text,
                     "success": True
                 })
             except Exception as e:
-                logger.error(f"Failed to extract page {i}: {e}")
+                logger.error(f"Failed to extract page {i + 1}: {e}")
                 pages.append({
-                    "page_number": i,
+                    "page_number": i + 1,
                     "text": "",
                     "success": False,
                     "error": str(e)
                 })
+    finally:
+        pdf.close()
+    return pages
+
+
+def _extract_pdf_fallback(source: Union[Path, BinaryIO]):
+    """Extract PDF using pypdfium2 when installed (it ships with docling), else PyPDF2."""
+    try:
+        return _extract_pdf_pdfium(source)
+    except ImportError:
+        pass
+
+    try:
+        import PyPDF2
+    except ImportError:
+        raise ImportError("PyPDF2 not installed. Install with: pip install pypdfium2 (or PyPDF2)")
     
+    # PdfReader accepts either a path or a binary stream
+    reader = PyPDF2.PdfReader(source)
+    page_count = len(reader.pages)
+    n_workers = _choose_pdf_workers(page_count)
+    if n_workers < 2:
+        return _extract_pdf_pages(reader, 0, page_count)
+
+    if isinstance(source, Path):
+        data = source.read_bytes()
+    else:
+        source.seek(0)
+        data = source.read()
+    pool = _get_pdf_pool()
+    step = -(-page_count // n_workers)  # ceil division: one range per worker
+    futures = [
+        pool.submit(_extract_pdf_range, data, start, min(start + step, page_count))
+        for start in range(0, page_count, step)
+    ]
+    pages = []
+    for fut in futures:
+        pages.extend(fut.result())
     return pages
 
 
-def _extract_docx_fallback(file_path: Path):
+def _extract_docx_fallback(source: Union[Path, BinaryIO]):
     """Extract DOCX using python-docx."""
     try:
         import docx
     except ImportError:
         raise ImportError("python-docx not installed. Install with: pip install python-docx")
     
-    doc = docx.Document(file_path)
-    text = "\n\n".join([para.text for para in doc.paragraphs if para.text.strip()])
+    doc = docx.Document(str(source) if isinstance(source, Path) else source)
+    # para.text re-assembles the paragraph from its XML runs on every access, so read it once
+    texts = (para.text for para in doc.paragraphs)
+    text = "\n\n".join(t for t in texts if t and not t.isspace())
     
     return [{
         "page_number": 1,
@@ -198,10 +387,22 @@ def _extract_docx_fallback(file_path: Path):
     }]
 
 
-def _extract_txt(file_path: Path):
+def _decode_file_utf8(path: Path) -> str:
+    """Decode a file straight from a read-only mapping, without first copying it into a bytes object."""
+    import mmap
+    with open(path, "rb") as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            return ""  # empty files cannot be mapped
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return str(mm, "utf-8", "ignore")
+
+
+def _extract_txt(source: Union[Path, BinaryIO]):
     """Extract plain text file."""
-    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-        text = f.read()
+    if isinstance(source, Path):
+        text = _decode_file_utf8(source)
+    else:
+        text = source.read().decode("utf-8", errors="ignore")
     
     return [{
         "page_number": 1,
@@ -210,17 +411,63 @@ def _extract_txt(file_path: Path):
     }]
 
 
-def _extract_image_ocr(file_path: Path):
+_tess_local = threading.local()
+
+# Adaptive thresholding only helps faint or unevenly lit scans; on clean screenshots
+# and photos it adds speckle noise. Images whose grayscale standard deviation is at
+# or above this are passed to Tesseract untouched (it binarizes internally).
+OCR_THRESHOLD_MAX_STDDEV = 40.0
+
+
+def _preprocess_for_ocr(img):
+    """
+    Grayscale + adaptive threshold for low-contrast images, so Tesseract sees
+    clean black-on-white text. Skipped without OpenCV and for images that
+    already have good contrast.
+    """
+    try:
+        import cv2
+        import numpy as np
+        from PIL import Image
+    except ImportError:
+        return img
+    gray = cv2.cvtColor(np.array(img.convert("RGB")), cv2.COLOR_RGB2GRAY)
+    if float(gray.std()) >= OCR_THRESHOLD_MAX_STDDEV:
+        return img
+    binary = cv2.adaptiveThreshold(
+        gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 10
+    )
+    return Image.fromarray(binary)
+
+
+def _ocr_image(img) -> str:
+    """
+    OCR a PIL image. With tesserocr installed, each thread keeps one initialised
+    Tesseract engine and reuses it for every image; pytesseract instead starts a
+    tesseract process (and loads the language data) per call.
+    """
+    api = getattr(_tess_local, "api", None)
+    if api is None:
+        try:
+            from tesserocr import PyTessBaseAPI
+        except ImportError:
+            import pytesseract
+            return pytesseract.image_to_string(img)
+        api = _tess_local.api = PyTessBaseAPI()
+    api.SetImage(img)
+    return api.GetUTF8Text()
+
+
+def _extract_image_ocr(source: Union[Path, BinaryIO]):
     """Extract text from image using Tesseract OCR."""
     try:
         from PIL import Image
-        import pytesseract
     except ImportError:
-        raise ImportError("PIL/pytesseract not installed. Install with: pip install Pillow pytesseract")
+        raise ImportError("PIL not installed. Install with: pip install Pillow pytesseract")
     
     try:
-        img = Image.open(file_path)
-        text = pytesseract.image_to_string(img)
+        img = _preprocess_for_ocr(Image.open(source))
+        text = _ocr_image(img)
         
         return [{
             "page_number": 1,
@@ -0,0 +1,133 @@
+"""
+Shared Gemini client set-up.
+
+genai.configure sets process-wide SDK state, so it happens here, once per API
+key, and every service gets its GenerativeModel handles from get_model instead
+of configuring the SDK itself on each call. Every generate_content call goes
+through generate_with_retry, so 429s and transient errors are retried the same
+way everywhere. first_json_object is the shared recovery step for responses
+that do not parse as JSON directly.
+"""
+from __future__ import annotations
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import app.config as cfg
+
+# Gemini SDK
+try:
+    import google.generativeai as genai
+    from google.api_core import exceptions as google_exceptions
+except Exception as e:
+    raise ImportError(
+        "google-generativeai is required. Install with:\n  pip install google-generativeai"
+    ) from e
+
+
+_MODELS: Dict[str, Any] = {}
+_LOCK = threading.Lock()
+_configured_key: Optional[str] = None
+
+
+def get_model(model_name: str, api_key: Optional[str] = None):
+    """
+    Return a GenerativeModel for model_name, built once and reused by every caller.
+
+    api_key defaults to GOOGLE_API_KEY; the SDK is reconfigured (and the model
+    handles rebuilt) only when a different key is passed.
+    """
+    key = api_key or cfg.GOOGLE_API_KEY
+    global _configured_key
+    with _LOCK:
+        if _configured_key != key:
+            genai.configure(api_key=key)
+            _configured_key = key
+            _MODELS.clear()
+        model = _MODELS.get(model_name)
+        if model is None:
+            # No system_instruction: callers put their system prompt in the prompt itself
+            model = _MODELS[model_name] = genai.GenerativeModel(model_name)
+        return model
+
+
+# Transient Gemini failures worth retrying; 429s additionally throttle every caller.
+_RETRYABLE_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+)
+_MAX_ATTEMPTS = 5
+_BACKOFF_BASE_S = 1.0
+_BACKOFF_CAP_S = 30.0
+
+# Monotonic deadline set on a 429 so concurrent calls wait out the quota window together.
+_throttle_until = 0.0
+_THROTTLE_LOCK = threading.Lock()
+
+
+def _backoff_delay(attempt: int, throttled: bool) -> float:
+    """Full-jitter exponential backoff; rate-limit errors start from a larger base."""
+    base = _BACKOFF_BASE_S * (4 if throttled else 1)
+    return random.uniform(0, min(_BACKOFF_CAP_S, base * 2 ** attempt))
+
+
+def generate_with_retry(model, prompt, part_name: str = "Gemini call", **kwargs):
+    """Call model.generate_content, retrying transient and 429 errors."""
+    global _throttle_until
+    for attempt in range(_MAX_ATTEMPTS):
+        with _THROTTLE_LOCK:
+            wait = _throttle_until - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        try:
+            return model.generate_content(prompt, **kwargs)
+        except _RETRYABLE_ERRORS as e:
+            if attempt == _MAX_ATTEMPTS - 1:
+                raise
+            throttled = isinstance(e, google_exceptions.ResourceExhausted)
+            delay = _backoff_delay(attempt, throttled)
+            if throttled:
+                with _THROTTLE_LOCK:
+                    _throttle_until = max(_throttle_until, time.monotonic() + delay)
+            print(f"     {part_name}: {type(e).__name__}, retrying in {delay:.1f}s "
+                  f"(attempt {attempt + 2}/{_MAX_ATTEMPTS})")
+            time.sleep(delay)
+
+
+# Only these characters can change the scanner's state
+_JSON_SCAN_RE = re.compile(r'[{}"\\]')
+
+
+def first_json_object(text: str) -> Optional[str]:
+    """Return the first balanced {...} block in text, skipping braces inside strings."""
+    start = text.find("{")
+    if start == -1:
+        return None
+    depth = 0
+    in_string = False
+    escaped_at = -1  # index of the character following a backslash inside a string
+    # Jump between structural characters with the regex engine instead of
+    # stepping through every character of the (mostly string) payload in Python
+    for m in _JSON_SCAN_RE.finditer(text, start):
+        i = m.start()
+        if i == escaped_at:
+            continue
+        ch = text[i]
+        if in_string:
+            if ch == "\\":
+                escaped_at = i + 1
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start : i + 1]
+    return None
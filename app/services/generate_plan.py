@@ -1,16 +1,10 @@
 from __future__ import annotations
-import json
+import orjson
 from typing import List, Dict, Any, Optional, Union
 
 import app.config as cfg
-
-# Gemini SDK
-try:
-    import google.genai as genai
-except Exception as e:
-    raise ImportError(
-        "google-genai is required. Install it with:\n  pip install google-genai"
-    ) from e
+from app.services import content_cache
+from app.services.gemini import first_json_object, generate_with_retry, get_model
 
 
 # =========================
@@ -81,14 +75,14 @@ def _build_prompt(
 # JSON helpers
 # =========================
 def _json_sanitize(s: str) -> Dict[str, Any]:
+    # JSON mode makes the first parse succeed; the {...} recovery is a safety net
     try:
-        return json.loads(s)
-    except Exception:
+        return orjson.loads(s)
+    except orjson.JSONDecodeError:
         pass
-    start = s.find("{")
-    end = s.rfind("}")
-    if start != -1 and end != -1 and end > start:
-        return json.loads(s[start:end + 1])
+    block = first_json_object(s)
+    if block is not None:
+        return orjson.loads(block)
     raise ValueError("LLM did not return valid JSON.")
 
 
@@ -129,19 +123,30 @@ def generate_plan(
     if not cfg.GOOGLE_API_KEY:
         raise RuntimeError("GOOGLE_API_KEY missing. Set it in your environment/.env.")
 
-    genai.configure(api_key=cfg.GOOGLE_API_KEY)
-
-    model = genai.GenerativeModel(model_name or getattr(cfg, "LLM_MODEL_NAME", "gemini-2.5-flash"))
-
+    llm_model = model_name or getattr(cfg, "LLM_MODEL_NAME", "gemini-2.5-flash")
     prompt = _build_prompt(level=level, style=style, topic=topic_str, language=language, description=description)
 
-    resp = model.generate_content([
-        {"role": "model", "parts": _SYSTEM_PROMPT},
-        {"role": "user", "parts": prompt}
-    ])
-
-    raw = (resp.text or "").strip()
-    data = _json_sanitize(raw)
+    # The same prompt + model has already been answered -> reuse that plan
+    cache_file = content_cache.cache_path({"kind": "plan", "prompt": prompt, "model": llm_model})
+    data = content_cache.load(cache_file) if content_cache.cache_enabled() else None
+    if data is None:
+        model = get_model(llm_model)
+
+        resp = generate_with_retry(
+            model,
+            [
+                {"role": "model", "parts": _SYSTEM_PROMPT},
+                {"role": "user", "parts": prompt}
+            ],
+            "plan",
+            # JSON mode: the reply is bare JSON, never wrapped in a ```json fence
+            generation_config={"response_mime_type": "application/json"},
+        )
+
+        raw = (resp.text or "").strip()
+        data = _json_sanitize(raw)
+        if content_cache.cache_enabled():
+            content_cache.store(cache_file, data)
 
     # Ensure defaults
     data.setdefault("topic", topic_str)  # fixed: use topic_str
@@ -1,15 +1,11 @@
 from __future__ import annotations
+import re
 from typing import List
 
 import app.config as cfg
-
-# Gemini SDK
-try:
-    import google.generativeai as genai
-except Exception as e:
-    raise ImportError(
-        "google-generativeai is required. Install it with:\n  pip install google-generativeai"
-    ) from e
+from app.services import content_cache
+from app.services.chunker import count_tokens
+from app.services.gemini import generate_with_retry, get_model
 
 
 _LLM_PROMPT_TEMPLATE = """
@@ -32,16 +28,50 @@ Content Plan:
 \"\"\"{plan_text}\"\"\"
 """.strip()
 
+# One match per non-blank line, leading whitespace skipped
+_NONBLANK_LINE_RE = re.compile(r"[^\S\n]*(\S[^\n]*)")
+
+# Longer plans are cut to this many tokens, at a sentence or line boundary, before prompting
+PLAN_MAX_TOKENS = 1500
+# End of a sentence (after its punctuation) or of a line (bullets often have no full
+# stop). A full stop after a digit is a list marker ("1. ..."), not a sentence end.
+_BOUNDARY_RE = re.compile(r"(?:(?<!\d)\.|[!?])(?=\s)|(?=\n)")
+
+
+def _truncate_plan(plan: str, max_tokens: int = PLAN_MAX_TOKENS) -> str:
+    """
+    Cut plan at the last sentence or line boundary that fits in max_tokens. The
+    kept prefix is returned as-is, so newlines and bullet/numbered structure
+    survive.
+    """
+    if count_tokens(plan) <= max_tokens:
+        return plan
+    offset = 0
+    total = 0
+    for m in _BOUNDARY_RE.finditer(plan):
+        if m.end() <= offset:
+            continue
+        total += count_tokens(plan[offset:m.end()])
+        if total > max_tokens:
+            break
+        offset = m.end()
+    if offset:
+        return plan[:offset]
+    # A single over-long first sentence is still better than an empty plan; cut it
+    # at the last line break or space so no word is split.
+    head = plan[: max_tokens * 4]
+    cut = max(head.rfind("\n"), head.rfind(" "))
+    return head[:cut] if cut > 0 else head
+
 
 def _gemini_queries(plan: str, n_total: int, model_name: str) -> List[str]:
     """Call Gemini model to generate short, diverse RAG queries."""
-    genai.configure(api_key=cfg.GOOGLE_API_KEY)
-    model = genai.GenerativeModel(model_name)
-    prompt = _LLM_PROMPT_TEMPLATE.format(n_total=n_total, plan_text=plan[:6000])
+    model = get_model(model_name)
+    prompt = _LLM_PROMPT_TEMPLATE.format(n_total=n_total, plan_text=plan)
     
     # FIX: Handle response more safely
     try:
-        resp = model.generate_content(prompt)
+        resp = generate_with_retry(model, prompt, "queries")
         
         # Check if response has text attribute and it's not None
         if not hasattr(resp, 'text'):
@@ -63,20 +93,18 @@ def _gemini_queries(plan: str, n_total: int, model_name: str) -> List[str]:
     out: List[str] = []
     seen = set()
 
-    for line in text.splitlines():
-        q = line.strip().strip("-•").strip()
-        if not q:
-            continue
-        q = " ".join(q.split())
-        q = q.strip('"').strip("'").lower()
-        if q in seen:
+    # Scan lines lazily and stop as soon as enough queries are collected
+    for m in _NONBLANK_LINE_RE.finditer(text):
+        if len(out) >= n_total:
+            break
+        # One split both collapses whitespace and caps the query at 9 words
+        words = m.group(1).strip().strip("-•").split()[:9]
+        q = " ".join(words).strip("\"'").lower()
+        # Dedupe on the final form, so queries differing only past word 9 collapse
+        if not q or q in seen:
             continue
-        words = q.split()
-        if len(words) > 9:
-            q = " ".join(words[:9])
-        if q:
-            seen.add(q)
-            out.append(q)
+        seen.add(q)
+        out.append(q)
 
     return out[:n_total]
 
@@ -93,4 +121,14 @@ def generate_queries_from_plan(plan: str, n: int = 8, model_name: str | None = N
 
     n = max(3, min(12, n))
     llm_model = model_name or getattr(cfg, "LLM_MODEL_NAME", "gemini-2.5-flash")
-    return _gemini_queries(plan, n_total=n, model_name=llm_model)
+
+    plan = _truncate_plan(plan)
+
+    # Same plan (as sent to the model), count and model -> reuse the earlier queries
+    cache_file = content_cache.cache_path({"kind": "queries", "plan": plan, "n": n, "model": llm_model})
+    queries = content_cache.load(cache_file) if content_cache.cache_enabled() else None
+    if queries is None:
+        queries = _gemini_queries(plan, n_total=n, model_name=llm_model)
+        if queries and content_cache.cache_enabled():
+            content_cache.store(cache_file, queries)
+    return queries
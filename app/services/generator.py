@@ -1,18 +1,18 @@
 from __future__ import annotations
-import json
-from typing import List, Dict, Any, Union
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple, Union
+
+from typing_extensions import TypedDict
 
 import app.config as cfg
+from app.services import content_cache
+from app.services.chunker import count_tokens
+from app.services.embeddings import embed_texts
+from app.services.gemini import first_json_object, generate_with_retry, get_model
 from app.services.retriever import retrieve_from_queries
 
-# Gemini SDK
-try:
-    import google.generativeai as genai
-except Exception as e:
-    raise ImportError(
-        "google-generativeai is required. Install with:\n  pip install google-generativeai"
-    ) from e
-
 # =========================
 # System style (enhanced pedagogy, analogies, and completeness)
 # =========================
@@ -130,60 +130,239 @@ NOTES:
 - Avoid any citations, source mentions, or URLs in the output.
 """
 
+# =========================
+# Response schemas (mirror the text schemas above)
+# =========================
+# Passed as response_schema so Gemini's decoder can only emit objects of this
+# shape; the text schemas stay in the prompt for the per-field guidance.
+class _NotesSection(TypedDict):
+    title: str
+    bullets: List[str]
+
+
+class _GlossaryEntry(TypedDict):
+    term: str
+    definition: str
+
+
+class _Misconception(TypedDict):
+    statement: str
+    correction: str
+
+
+class _NotesOut(TypedDict):
+    topic: str
+    objective: str
+    level: str
+    language: str
+    style: str
+    summary: str
+    key_points: List[str]
+    sections: List[_NotesSection]
+    glossary: List[_GlossaryEntry]
+    misconceptions: List[_Misconception]
+
+
+class _SummaryOut(TypedDict):
+    topic: str
+    objective: str
+    level: str
+    language: str
+    style: str
+    summary: str
+    key_points: List[str]
+
+
+class _MCQ(TypedDict):
+    stem: str
+    options: List[str]
+    answer: str
+    explanation: str
+
+
+class _MCQsOut(TypedDict):
+    topic: str
+    objective: str
+    level: str
+    language: str
+    style: str
+    questions: List[_MCQ]
+
+
+class _FusedOut(TypedDict):
+    notes: _NotesOut
+    summary: _SummaryOut
+    mcqs: _MCQsOut
+
+
+_RESPONSE_SCHEMAS = {"notes": _NotesOut, "summary": _SummaryOut, "mcqs": _MCQsOut}
+
 # =========================
 # Context packing (no IDs, just text)
 # =========================
-def _pack_context(hits: List[Dict[str, Any]], max_context_chars: int = 6000) -> str:
+# Retrieved chunks recur across queries and requests; count each one once.
+_snippet_tokens = lru_cache(maxsize=4096)(count_tokens)
+
+
+def _pack_context(hits: List[Dict[str, Any]], max_context_tokens: int = 1500) -> str:
     """
-    Build a plain context block (no chunk IDs). We still cap total size.
+    Build a plain context block (no chunk IDs). We still cap total size,
+    measured in tokens so the budget means the same thing in every language.
     """
-    lines = ["CONTEXT SNIPPETS:"]
+    snippets: List[str] = []
+    seen: set[str] = set()
     total = 0
     for h in hits:
-        txt = (h.get("text") or "").strip()
+        txt = h.get("text")  # already stripped by the retriever
         if not txt:
             continue
-        snippet = f"{txt}\n"
-        # keep at least one snippet even if long; otherwise cap by max_context_chars
-        if total + len(snippet) > max_context_chars and total > 0:
+        # RRF already merges hits by chunk id, but the same passage can be indexed
+        # under several ids (overlapping sources); spend the budget on it once
+        norm = " ".join(txt.split()).lower()
+        if norm in seen:
+            continue
+        seen.add(norm)
+        n_tokens = _snippet_tokens(txt) + 1  # + the trailing newline
+        # keep at least one snippet even if long; otherwise cap by max_context_tokens
+        if total + n_tokens > max_context_tokens and total > 0:
             break
-        lines.append(snippet)
-        total += len(snippet)
-    return "\n".join(lines)
+        snippets.append(txt)
+        total += n_tokens
+    if not snippets:
+        return "CONTEXT SNIPPETS:"
+    # Same layout as before ("header\nsnippet\n\nsnippet\n"), assembled by one join
+    return "CONTEXT SNIPPETS:\n" + "\n\n".join(snippets) + "\n"
+
+
+# The system prompt and schemas never change, so the text around the per-request
+# part (task + context) is assembled once at import. The system prompt is included
+# in the user prompt rather than sent separately. Everything up to and including
+# the context is identical for the three objectives and the objective + schema
+# come last, so the three calls share one long prompt prefix that Gemini's
+# implicit prefix caching can reuse instead of prefilling it three times.
+_PROMPT_PREFIX = f"{_SYSTEM_PROMPT}\n\n"
+_PROMPT_SUFFIXES = {
+    objective: f"\n\nOBJECTIVE: {objective}\n\n{schema}"
+    for objective, schema in (("notes", _SCHEMA_NOTES), ("summary", _SCHEMA_SUMMARY), ("mcqs", _SCHEMA_MCQS))
+}
+_FUSED_SUFFIX = (
+    "\n\nOBJECTIVE: notes, summary and mcqs\n\n"
+    'Return ONE JSON object with exactly the keys "notes", "summary" and "mcqs". '
+    "Each value must follow the matching schema below.\n\n"
+    f"--- notes ---\n{_SCHEMA_NOTES}\n--- summary ---\n{_SCHEMA_SUMMARY}\n--- mcqs ---\n{_SCHEMA_MCQS}"
+)
+
 
+def _build_task(topic: str, level: str, style: str, language: str) -> str:
+    # format_map takes the dict as-is instead of packing keyword arguments
+    return _TASK_TEMPLATE.format_map({"topic": topic, "level": level, "style": style, "language": language})
 
-def _build_prompt(objective: str, topic: str, level: str, style: str, language: str, context_block: str) -> str:
-    task = _TASK_TEMPLATE.format(topic=topic, level=level, style=style, language=language)
-    schema = _SCHEMA_NOTES if objective == "notes" else (_SCHEMA_SUMMARY if objective == "summary" else _SCHEMA_MCQS)
-    # Include system prompt in the user prompt instead
-    return f"{_SYSTEM_PROMPT}\n\nOBJECTIVE: {objective}\n\n{task}\n\n{context_block}\n\n{schema}"
+
+def _build_prompt(objective: str, task: str, context_block: str) -> str:
+    return "".join((_PROMPT_PREFIX, task, "\n\n", context_block, _PROMPT_SUFFIXES[objective]))
+
+
+def _build_fused_prompt(task: str, context_block: str, mcq_count: int) -> str:
+    """One prompt asking for all three objectives, so the context is sent once."""
+    return "".join((
+        _PROMPT_PREFIX, task, "\n\n", context_block, _FUSED_SUFFIX,
+        f"\nAdditional requirement: generate approximately {mcq_count} questions.",
+    ))
 
 # =========================
 # Gemini call + JSON guard
 # =========================
-def _gemini_call(prompt: str, model_name: str) -> str:
-    genai.configure(api_key=cfg.GOOGLE_API_KEY)
-    # Remove system_instruction parameter - include system prompt in the main prompt instead
-    model = genai.GenerativeModel(model_name)
-    resp = model.generate_content(prompt)
+def _gemini_call(prompt: str, model_name: str, json_mode: bool = False, schema: Any = None) -> str:
+    """schema (a TypedDict) implies json_mode and constrains decoding to that shape."""
+    model = get_model(model_name)
+    if json_mode or schema is not None:
+        generation_config: Dict[str, Any] = {"response_mime_type": "application/json"}
+        if schema is not None:
+            generation_config["response_schema"] = schema
+        resp = generate_with_retry(model, prompt, generation_config=generation_config)
+    else:
+        resp = generate_with_retry(model, prompt)
     return (resp.text or "").strip()
 
 
 def _json_sanitize(s: str) -> Dict[str, Any]:
     """
     Parse JSON; if it fails, try to recover the first {...} block.
+
+    Schema-constrained responses parse on the first try; the recovery path is
+    kept for models that ignore response_schema.
     """
     try:
-        return json.loads(s)
-    except Exception:
+        return orjson.loads(s)
+    except orjson.JSONDecodeError:
         pass
-    start = s.find("{")
-    end = s.rfind("}")
-    if start != -1 and end != -1 and end > start:
-        return json.loads(s[start:end + 1])
+    # One forward scan that stops at the object's closing brace, so trailing
+    # text containing "}" cannot widen the slice
+    block = first_json_object(s)
+    if block is not None:
+        return orjson.loads(block)
     raise ValueError("LLM did not return valid JSON.")
 
 
+def _empty_section(objective: str, topic: str, level: str, language: str, style: str) -> Dict[str, Any]:
+    """Placeholder blob ('insufficient information') for one objective."""
+    blob: Dict[str, Any] = {
+        "topic": topic, "objective": objective, "level": level, "language": language, "style": style,
+    }
+    if objective == "notes":
+        blob.update(summary="insufficient information", key_points=[], sections=[], glossary=[], misconceptions=[])
+    elif objective == "summary":
+        blob.update(summary="insufficient information", key_points=[])
+    else:
+        blob.update(questions=[])
+    return blob
+
+
+def _generate_parallel(
+    prompts: Tuple[str, str, str], model: str, topic: str, level: str, language: str, style: str
+) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """Issue the notes/summary/mcqs prompts concurrently; returns (sections, errors)."""
+    # The three prompts are independent, so issue them concurrently; wall time is
+    # then bounded by the slowest call rather than the sum of all three.
+    # Each worker parses its own response, so JSON recovery for a finished section
+    # overlaps with the other sections still decoding.
+    # A failed section degrades to its empty scaffold instead of failing the others.
+    objectives = ("notes", "summary", "mcqs")
+    sections: Dict[str, Dict[str, Any]] = {}
+    errors: List[str] = []
+    with ThreadPoolExecutor(max_workers=len(prompts)) as pool:
+        futures = [
+            pool.submit(lambda p, o: _json_sanitize(_gemini_call(p, model, schema=_RESPONSE_SCHEMAS[o])), p, o)
+            for p, o in zip(prompts, objectives)
+        ]
+        for objective, future in zip(objectives, futures):
+            try:
+                sections[objective] = future.result()
+            except Exception as e:
+                print(f"    {objective} generation failed: {e}")
+                errors.append(f"{objective}: {e}")
+                sections[objective] = _empty_section(objective, topic, level, language, style)
+    if len(errors) == len(objectives):
+        raise RuntimeError("All Gemini generations failed: " + "; ".join(errors))
+    return sections, errors
+
+
+def _generate_fused(
+    topic: str, level: str, style: str, language: str, context_block: str, mcq_count: int, model: str
+) -> Dict[str, Dict[str, Any]] | None:
+    """Single fused call; returns None (caller falls back to per-section calls) on any failure."""
+    try:
+        prompt = _build_fused_prompt(_build_task(topic, level, style, language), context_block, mcq_count)
+        blob = _json_sanitize(_gemini_call(prompt, model, schema=_FusedOut))
+        sections = {k: blob.get(k) for k in ("notes", "summary", "mcqs")}
+        if all(isinstance(v, dict) for v in sections.values()):
+            return sections
+        print("    fused generation returned an incomplete object; falling back")
+    except Exception as e:
+        print(f"    fused generation failed ({e}); falling back")
+    return None
+
+
 # =========================
 # Public API
 # =========================
@@ -195,7 +374,7 @@ def generate_all(
     style: str = "concise",
     language: str = "en",
     final_k: int = 8,
-    max_context_chars: int = 6000,
+    max_context_tokens: int | None = None,
     model_name: str | None = None,
     mcq_count: int = 4
 ) -> Dict[str, Any]:
@@ -210,7 +389,7 @@ def generate_all(
         style: Writing style (concise/detailed/exam-prep)
         language: Output language code
         final_k: Number of context chunks to retrieve
-        max_context_chars: Maximum characters for context
+        max_context_tokens: Token budget for context (defaults to config)
         model_name: Gemini model name (defaults to config)
         mcq_count: Number of MCQs to generate
         
@@ -225,6 +404,23 @@ def generate_all(
     else:
         topic_str = topic or "General Topic"
 
+    model = model_name or getattr(cfg, "LLM_MODEL_NAME", "gemini-1.5-flash")
+
+    # 0) Opt-in: a near-identical request (same source, topic and settings, similar
+    #    queries) was answered before -> reuse it and skip retrieval and generation.
+    #    The topic is part of the scope so different subtopics never share content.
+    semantic_scope = probe = None
+    if content_cache.cache_enabled() and cfg.SEMANTIC_CACHE_THRESHOLD > 0:
+        semantic_scope = {
+            "namespace": namespace, "topic": topic_str, "level": level, "style": style,
+            "language": language, "mcq_count": mcq_count, "final_k": final_k, "model": model,
+        }
+        probe = embed_texts(["\n".join([topic_str, *queries])])[0]
+        sections = content_cache.semantic_lookup(semantic_scope, probe, cfg.SEMANTIC_CACHE_THRESHOLD)
+        if sections is not None:
+            print("    Reusing cached content for a near-identical request")
+            return _assemble_result(sections, topic_str, level, language, style, reused=True)
+
     # 1) Retrieve once using your simple dense RAG
     hits = retrieve_from_queries(
         namespace=namespace,
@@ -236,53 +432,58 @@ def generate_all(
 
     # If nothing retrieved, return "insufficient information" scaffolds
     if not hits:
-        scaffold = {
-            "topic": topic_str,
-            "level": level,
-            "language": language,
-            "style": style,
-            "notes": {
-                "topic": topic_str, "objective": "notes", "level": level, "language": language, "style": style,
-                "summary": "insufficient information",
-                "key_points": [],
-                "sections": [],
-                "glossary": [],
-                "misconceptions": []
-            },
-            "summary": {
-                "topic": topic_str, "objective": "summary", "level": level, "language": language, "style": style,
-                "summary": "insufficient information",
-                "key_points": []
-            },
-            "mcqs": {
-                "topic": topic_str, "objective": "mcqs", "level": level, "language": language, "style": style,
-                "questions": []
-            }
-        }
+        scaffold = {"topic": topic_str, "level": level, "language": language, "style": style}
+        for objective in ("notes", "summary", "mcqs"):
+            scaffold[objective] = _empty_section(objective, topic_str, level, language, style)
         return scaffold
 
-    context_block = _pack_context(hits, max_context_chars=max_context_chars)
-    model = model_name or getattr(cfg, "LLM_MODEL_NAME", "gemini-1.5-flash")
+    context_block = _pack_context(hits, max_context_tokens=max_context_tokens or cfg.MAX_CONTEXT_TOKENS)
 
-    # 2) NOTES
-    notes_prompt = _build_prompt("notes", topic_str, level, style, language, context_block)
-    notes_raw = _gemini_call(notes_prompt, model)
-    notes = _json_sanitize(notes_raw)
+    # Same retrieved context + parameters -> reuse the previously generated sections
+    cache_file = content_cache.cache_path({
+        "context": context_block, "topic": topic_str, "level": level, "style": style,
+        "language": language, "mcq_count": mcq_count, "model": model,
+    })
+    sections = content_cache.load(cache_file) if content_cache.cache_enabled() else None
+    if sections is not None:
+        print(f"    Reusing cached content -> {cache_file}")
+    else:
+        errors: List[str] = []
+        if cfg.FUSED_GENERATION:
+            sections = _generate_fused(topic_str, level, style, language, context_block, mcq_count, model)
+        if sections is None:
+            # Prompts are only built on a cache miss; the task block is shared by all three
+            task = _build_task(topic_str, level, style, language)
+            # 2) NOTES
+            notes_prompt = _build_prompt("notes", task, context_block)
+            # 3) SUMMARY
+            summary_prompt = _build_prompt("summary", task, context_block)
+            # 4) MCQS (nudge for quantity)
+            mcq_steer = f"\n\nAdditional requirement: generate approximately {mcq_count} questions."
+            mcqs_prompt = _build_prompt("mcqs", task, context_block) + mcq_steer
+            sections, errors = _generate_parallel(
+                (notes_prompt, summary_prompt, mcqs_prompt), model, topic_str, level, language, style
+            )
+        # Never cache a result that contains a fallback scaffold
+        if not errors and content_cache.cache_enabled():
+            content_cache.store(cache_file, sections)
+            if semantic_scope is not None:
+                content_cache.semantic_add(semantic_scope, probe, cache_file)
+    return _assemble_result(sections, topic_str, level, language, style)
 
-    # 3) SUMMARY
-    summary_prompt = _build_prompt("summary", topic_str, level, style, language, context_block)
-    summary_raw = _gemini_call(summary_prompt, model)
-    summary = _json_sanitize(summary_raw)
 
-    # 4) MCQS (nudge for quantity)
-    mcq_steer = f"\n\nAdditional requirement: generate approximately {mcq_count} questions."
-    mcqs_prompt = _build_prompt("mcqs", topic_str, level, style, language, context_block) + mcq_steer
-    mcqs_raw = _gemini_call(mcqs_prompt, model)
-    mcqs = _json_sanitize(mcqs_raw)
+def _assemble_result(
+    sections: Dict[str, Any], topic_str: str, level: str, language: str, style: str, reused: bool = False
+) -> Dict[str, Any]:
+    notes, summary, mcqs = sections["notes"], sections["summary"], sections["mcqs"]
 
     # Backfill missing required fields if the model omitted any
     for blob, objective in ((notes, "notes"), (summary, "summary"), (mcqs, "mcqs")):
-        blob.setdefault("topic", topic_str)
+        if reused:
+            # Content reused from another request carries that request's topic label
+            blob["topic"] = topic_str
+        else:
+            blob.setdefault("topic", topic_str)
         blob.setdefault("objective", objective)
         blob.setdefault("level", level)
         blob.setdefault("language", language)
@@ -296,4 +497,19 @@ def generate_all(
         "notes": notes,
         "summary": summary,
         "mcqs": mcqs,
-    }
\ No newline at end of file
+    }
+
+
+def generate_all_batch(items: List[Dict[str, Any]], max_concurrency: int = 8) -> List[Dict[str, Any]]:
+    """
+    Run generate_all for many requests at once (e.g. a pack per topic for a class).
+
+    items: one dict of generate_all keyword arguments per request.
+    Returns the results in the same order as items. generate_all is I/O-bound, so
+    threads overlap the Gemini round-trips; each request can itself have three
+    calls in flight, so keep max_concurrency well inside the model's QPM quota.
+    """
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(items)))) as pool:
+        return list(pool.map(lambda kwargs: generate_all(**kwargs), items))
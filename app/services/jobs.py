@@ -0,0 +1,136 @@
+"""
+Background jobs for long pipeline runs.
+
+A job runs on a thread pool inside the process that accepted it, so the HTTP
+request returns immediately with a job id. Status is written to
+data/outputs/.jobs/<id>.json, which lets any worker process on the host answer
+GET /api/jobs/<id>. Records older than JOB_TTL are deleted, and a job whose
+worker process has gone (e.g. restarted mid-run) is reported as failed.
+"""
+from __future__ import annotations
+import hashlib
+import os
+import re
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import orjson
+
+import app.config as cfg
+
+_JOB_ID_RE = re.compile(r"[0-9a-f]{32}")
+
+_POOL = ThreadPoolExecutor(max_workers=cfg.JOB_WORKERS, thread_name_prefix="pipeline-job")
+# dedupe_key -> job_id for jobs that are queued or running in this process
+_INFLIGHT: Dict[str, str] = {}
+_INFLIGHT_LOCK = threading.Lock()
+
+# Identifies this process in job records; the start time tells a restarted worker
+# that reused the same pid (common in containers) apart from the original one.
+_OWNER = {"pid": os.getpid(), "process_started_at": time.time()}
+
+# Expired records are swept at most this often, from submit
+_PRUNE_INTERVAL_S = 300
+_last_prune = 0.0
+
+
+def fingerprint(value: Any) -> str:
+    """Stable hash of a JSON-serialisable request, for use as a dedupe_key."""
+    return hashlib.sha256(orjson.dumps(value, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+def _jobs_dir() -> Path:
+    return Path(cfg.DATA_PATH) / "outputs" / ".jobs"
+
+
+def _write(job_id: str, record: Dict[str, Any]) -> None:
+    """Atomic write so a poll never sees a half-written status file."""
+    path = _jobs_dir() / f"{job_id}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(orjson.dumps(record, default=str))
+    os.replace(tmp, path)
+
+
+def _prune() -> None:
+    """Delete status records not updated within JOB_TTL seconds."""
+    global _last_prune
+    now = time.time()
+    with _INFLIGHT_LOCK:
+        if now - _last_prune < _PRUNE_INTERVAL_S:
+            return
+        _last_prune = now
+    for path in _jobs_dir().glob("*.json"):
+        try:
+            if now - path.stat().st_mtime > cfg.JOB_TTL:
+                path.unlink()
+        except OSError:
+            continue
+
+
+def _owner_alive(record: Dict[str, Any]) -> bool:
+    """Whether the process that accepted this job is still running."""
+    pid = record.get("pid")
+    if pid is None:
+        return True  # record predates owner tracking; leave it to the TTL
+    if pid == _OWNER["pid"]:
+        return record.get("process_started_at") == _OWNER["process_started_at"]
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass  # exists but belongs to another user
+    return True
+
+
+def _run(job_id: str, record: Dict[str, Any], dedupe_key: Optional[str], fn: Callable, args, kwargs) -> None:
+    _write(job_id, {**record, "status": "running", "started_at": time.time()})
+    try:
+        result = fn(*args, **kwargs)
+        _write(job_id, {**record, "status": "done", "finished_at": time.time(), "result": result})
+    except Exception as e:
+        traceback.print_exc()
+        _write(job_id, {**record, "status": "failed", "finished_at": time.time(), "error": str(e)})
+    finally:
+        if dedupe_key is not None:
+            with _INFLIGHT_LOCK:
+                _INFLIGHT.pop(dedupe_key, None)
+
+
+def submit(fn: Callable[..., Any], *args, dedupe_key: Optional[str] = None, **kwargs) -> str:
+    """
+    Run fn(*args, **kwargs) in the background and return its job id.
+
+    While a job with the same dedupe_key is still queued or running, its id is
+    returned instead of starting a second identical run.
+    """
+    with _INFLIGHT_LOCK:
+        if dedupe_key is not None and dedupe_key in _INFLIGHT:
+            return _INFLIGHT[dedupe_key]
+        job_id = uuid.uuid4().hex
+        record = {"job_id": job_id, "created_at": time.time(), **_OWNER}
+        _write(job_id, {**record, "status": "queued"})
+        if dedupe_key is not None:
+            _INFLIGHT[dedupe_key] = job_id
+    _POOL.submit(_run, job_id, record, dedupe_key, fn, args, kwargs)
+    _prune()
+    return job_id
+
+
+def get(job_id: str) -> Optional[Dict[str, Any]]:
+    """Status record for job_id, or None if the id is unknown or malformed."""
+    if not _JOB_ID_RE.fullmatch(job_id or ""):
+        return None
+    try:
+        record = orjson.loads((_jobs_dir() / f"{job_id}.json").read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        return None
+    if record.get("status") in ("queued", "running") and not _owner_alive(record):
+        return {**record, "status": "failed", "error": "Worker process exited before the job finished"}
+    return record
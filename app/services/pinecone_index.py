@@ -1,4 +1,5 @@
 from __future__ import annotations
+from functools import lru_cache
 from typing import List, Dict, Any, Iterable, Optional
 
 import app.config as cfg
@@ -16,6 +17,9 @@ EMBED_DIM = 384
 DEFAULT_METRIC = "cosine"
 
 # --- Client + Index helpers ---------------------------------------------------
+# Client and Index handles are cached so their HTTP connection pools (and the
+# TLS sessions inside them) are reused across upserts and queries.
+@lru_cache(maxsize=1)
 def _get_pc() -> Pinecone:
     if not cfg.PINECONE_API_KEY:
         raise RuntimeError("Missing PINECONE_API_KEY in environment/.env")
@@ -45,8 +49,12 @@ def ensure_index() -> None:
         spec=ServerlessSpec(cloud=cloud, region=region),
     )
 
-def _get_index():
+@lru_cache(maxsize=None)
+def _get_index(pool_threads: int = 1):
     pc = _get_pc()
+    if pool_threads > 1:
+        # pool_threads backs upsert(..., async_req=True) with a bounded thread pool
+        return pc.Index(cfg.VECTOR_DB_NAME, pool_threads=pool_threads)
     return pc.Index(cfg.VECTOR_DB_NAME)
 
 
@@ -56,11 +64,13 @@ def upsert_chunks(
     embedded_chunks: List[Dict[str, Any]],
     batch_size: int = 100,
     store_text_metadata: bool = True,
+    max_concurrency: int = 8,
 ) -> int:
     """
     Upsert vectors into Pinecone.
     - namespace: The namespace to upsert into (e.g., "video:abc123" or "article:example:hash")
     - embedded_chunks: [{"id": "...", "text": "...", "vector": [...]}]
+    - max_concurrency: upper bound on batches in flight at once
     Returns: number of vectors upserted
     """
     if not embedded_chunks:
@@ -72,22 +82,23 @@ def upsert_chunks(
         if not isinstance(vec, (list, tuple)) or len(vec) != EMBED_DIM:
             raise ValueError(f"Vector dim mismatch (expected {EMBED_DIM}, got {len(vec) if vec is not None else 'None'})")
 
-    index = _get_index()
-
-    # batch and upsert
-    count = 0
-    batch: List[Dict[str, Any]] = []
+    # build batches
+    vectors: List[Dict[str, Any]] = []
     for c in embedded_chunks:
         meta = {"text": c["text"]} if store_text_metadata else None
-        batch.append({"id": c["id"], "values": c["vector"], "metadata": meta})
-        if len(batch) >= batch_size:
-            index.upsert(vectors=batch, namespace=namespace)
-            count += len(batch)
-            batch = []
-    if batch:
-        index.upsert(vectors=batch, namespace=namespace)
-        count += len(batch)
-    return count
+        vectors.append({"id": c["id"], "values": c["vector"], "metadata": meta})
+    batches = [vectors[i:i + batch_size] for i in range(0, len(vectors), batch_size)]
+
+    if len(batches) == 1:
+        _get_index().upsert(vectors=batches[0], namespace=namespace)
+        return len(vectors)
+
+    # send batches concurrently; .get() re-raises the first failed batch
+    index = _get_index(pool_threads=max(1, min(max_concurrency, len(batches))))
+    pending = [index.upsert(vectors=b, namespace=namespace, async_req=True) for b in batches]
+    for p in pending:
+        p.get()
+    return len(vectors)
 
 
 def query(
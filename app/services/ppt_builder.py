@@ -11,6 +11,15 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def ppt_filename_for(result: dict) -> str:
+    """File name build_ppt_from_result will save this result under."""
+    topic = result.get("topic", "Teaching Content")
+    if isinstance(topic, list):
+        topic = ", ".join(topic[:3])
+    topic_safe = str(topic).replace(' ', '_')[:30]
+    return f"{topic_safe}_presentation.pptx"
+
+
 def build_ppt_from_result(result: dict, output_dir: Path = None) -> Path:
     """
     Build a PowerPoint presentation from generation result.
@@ -40,20 +49,23 @@ def build_ppt_from_result(result: dict, output_dir: Path = None) -> Path:
     logger.info(f"Building PPT for topic: {topic}")
     logger.info(f"Result structure: {result.keys()}")
     
+    # Every slide uses the blank layout; resolve it once rather than per slide
+    blank = prs.slide_layouts[6]
+
     # 1. Title Slide
-    _add_title_slide(prs, topic, level)
+    _add_title_slide(prs, blank, topic, level)
     
     # 2. Summary Slides
     summary_data = result.get("summary", {})
     if summary_data and isinstance(summary_data, dict):
         logger.info(f"Adding summary slides: {summary_data.keys()}")
-        _add_summary_slides(prs, summary_data)
+        _add_summary_slides(prs, blank, summary_data)
     
     # 3. Notes Slides
     notes_data = result.get("notes", {})
     if notes_data and isinstance(notes_data, dict):
         logger.info(f"Adding notes slides: {notes_data.keys()}")
-        _add_notes_slides(prs, notes_data)
+        _add_notes_slides(prs, blank, notes_data)
     
     # 4. Glossary Slide
     glossary = None
@@ -62,7 +74,7 @@ def build_ppt_from_result(result: dict, output_dir: Path = None) -> Path:
     
     if glossary and len(glossary) > 0:
         logger.info(f"Adding glossary with {len(glossary)} terms")
-        _add_glossary_slide(prs, glossary)
+        _add_glossary_slide(prs, blank, glossary)
     
     # 5. MCQ Slides
     mcqs_data = result.get("mcqs", {})
@@ -70,21 +82,19 @@ def build_ppt_from_result(result: dict, output_dir: Path = None) -> Path:
         questions = mcqs_data.get("questions", [])
         if questions:
             logger.info(f"Adding {len(questions)} MCQ slides")
-            _add_mcq_slides(prs, questions)
+            _add_mcq_slides(prs, blank, questions)
     
     # Save
-    topic_safe = str(topic).replace(' ', '_')[:30]
-    ppt_filename = f"{topic_safe}_presentation.pptx"
-    ppt_path = output_dir / ppt_filename
+    ppt_path = output_dir / ppt_filename_for(result)
     prs.save(str(ppt_path))
     
     logger.info(f"PowerPoint saved: {ppt_path}")
     return ppt_path
 
 
-def _add_title_slide(prs, topic, level):
+def _add_title_slide(prs, layout, topic, level):
     """Add title slide with proper formatting."""
-    slide = prs.slides.add_slide(prs.slide_layouts[6])  # Blank layout
+    slide = prs.slides.add_slide(layout)
     
     # Background color
     background = slide.background
@@ -120,7 +130,7 @@ def _add_title_slide(prs, topic, level):
     p.font.color.rgb = RGBColor(200, 200, 200)
 
 
-def _add_summary_slides(prs, summary_data):
+def _add_summary_slides(prs, layout, summary_data):
     """Add summary slides with proper text wrapping."""
     logger.info(f"Summary data: {summary_data}")
     
@@ -129,7 +139,7 @@ def _add_summary_slides(prs, summary_data):
     
     # Summary text slide
     if summary_text and len(summary_text.strip()) > 0:
-        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        slide = prs.slides.add_slide(layout)
         
         # Title
         title_box = slide.shapes.add_textbox(
@@ -168,7 +178,7 @@ def _add_summary_slides(prs, summary_data):
     
     # Key points slide
     if key_points and len(key_points) > 0:
-        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        slide = prs.slides.add_slide(layout)
         
         # Title
         title_box = slide.shapes.add_textbox(
@@ -200,7 +210,7 @@ def _add_summary_slides(prs, summary_data):
         logger.info(f"Added key points slide with {len(key_points)} points")
 
 
-def _add_notes_slides(prs, notes_data):
+def _add_notes_slides(prs, layout, notes_data):
     """Add notes slides with sections - handles 'bullets' field."""
     logger.info(f"Notes data keys: {notes_data.keys()}")
     
@@ -216,7 +226,7 @@ def _add_notes_slides(prs, notes_data):
     for idx, section in enumerate(sections[:8]):  # Max 8 sections
         logger.info(f"Section {idx}: {section.get('title', 'Unknown')}")
         
-        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        slide = prs.slides.add_slide(layout)
         
         # Section title
         section_title = section.get("title", f"Section {idx + 1}")
@@ -262,14 +272,14 @@ def _add_notes_slides(prs, notes_data):
         logger.info(f"Added section slide: {section_title} with {len(bullets)} bullets")
 
 
-def _add_glossary_slide(prs, glossary):
+def _add_glossary_slide(prs, layout, glossary):
     """Add glossary slide in single-column layout."""
     # Create multiple slides if glossary is too long
     terms_per_slide = 8
     total_slides = (len(glossary) + terms_per_slide - 1) // terms_per_slide
     
     for slide_num in range(total_slides):
-        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        slide = prs.slides.add_slide(layout)
         
         # Title
         title_box = slide.shapes.add_textbox(
@@ -308,11 +318,11 @@ def _add_glossary_slide(prs, glossary):
             p.space_after = Pt(12)
 
 
-def _add_mcq_slides(prs, questions):
+def _add_mcq_slides(prs, layout, questions):
     """Add MCQ slides - handles 'stem' and 'answer' fields."""
     for idx, q in enumerate(questions[:10], 1):  # Max 10 MCQs
         # Question slide
-        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        slide = prs.slides.add_slide(layout)
         
         # Question number/title
         title_box = slide.shapes.add_textbox(
@@ -360,7 +370,7 @@ def _add_mcq_slides(prs, questions):
             p.space_after = Pt(12)
         
         # Answer slide
-        answer_slide = prs.slides.add_slide(prs.slide_layouts[6])
+        answer_slide = prs.slides.add_slide(layout)
         
         # Answer title
         ans_title_box = answer_slide.shapes.add_textbox(
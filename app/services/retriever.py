@@ -1,17 +1,53 @@
 from __future__ import annotations
-from typing import List, Dict, Any
-from collections import defaultdict
+from typing import List, Dict, Any, Optional
+import heapq
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 import app.config as cfg
 from app.services.embeddings import embed_texts
 from app.services.pinecone_index import query as pinecone_query
 
-def _rrf_fuse(ranked_lists: List[List[Dict[str, Any]]], k: int = 60) -> List[Dict[str, Any]]:
+# Upper bound on Pinecone queries in flight for one retrieval
+_MAX_SEARCH_WORKERS = 16
+
+# Query text -> embedding, most recently used last. The pipelines retrieve with the
+# same queries more than once per request (their own retrieval, then generate_all's),
+# so repeats skip the encoder.
+_QUERY_VECS: "OrderedDict[str, List[float]]" = OrderedDict()
+_QUERY_VECS_MAX = 4096
+_QUERY_VECS_LOCK = threading.Lock()
+
+
+def _embed_queries(queries: List[str]) -> List[List[float]]:
+    """embed_texts for queries, encoding only the ones not seen recently (in one batch)."""
+    found: Dict[str, List[float]] = {}
+    with _QUERY_VECS_LOCK:
+        for q in queries:
+            vec = _QUERY_VECS.get(q)
+            if vec is not None:
+                _QUERY_VECS.move_to_end(q)
+                found[q] = vec
+    missing = [q for q in queries if q not in found]
+    if missing:
+        vecs = embed_texts(missing)
+        found.update(zip(missing, vecs))
+        with _QUERY_VECS_LOCK:
+            _QUERY_VECS.update(zip(missing, vecs))
+            while len(_QUERY_VECS) > _QUERY_VECS_MAX:
+                _QUERY_VECS.popitem(last=False)
+    return [found[q] for q in queries]
+
+def _rrf_fuse(
+    ranked_lists: List[List[Dict[str, Any]]], k: int = 60, top_n: Optional[int] = None
+) -> List[Dict[str, Any]]:
     """
     Reciprocal Rank Fusion.
     ranked_lists: list of lists (each inner list is Pinecone results for one query)
     Each item must have {"id", "score", optional "text"}.
-    Returns a fused, deduplicated list sorted by descending RRF score.
+    Returns a fused, deduplicated list sorted by descending RRF score
+    (only the best top_n when given).
     """
     scores = defaultdict(float)
     keep_text = {}
@@ -20,11 +56,15 @@ def _rrf_fuse(ranked_lists: List[List[Dict[str, Any]]], k: int = 60) -> List[Dic
         for rank, item in enumerate(ranked, start=1):
             cid = item["id"]
             scores[cid] += 1.0 / (k + rank)
-            # keep one representative text for quick preview
+            # keep one representative text for quick preview, stripped once here
+            # so consumers (e.g. the generator's context packing) can use it as-is
             if cid not in keep_text and "text" in item:
-                keep_text[cid] = item["text"]
+                keep_text[cid] = (item["text"] or "").strip()
 
     fused = [{"id": cid, "score": s, "text": keep_text.get(cid)} for cid, s in scores.items()]
+    if top_n is not None:
+        # Same order as a full sort truncated to top_n, without sorting the rest
+        return heapq.nlargest(top_n, fused, key=lambda x: x["score"])
     fused.sort(key=lambda x: x["score"], reverse=True)
     return fused
 
@@ -48,25 +88,34 @@ def retrieve_from_queries(
 
     Returns: [{"id","score","text"(optional)}...]
     """
+    # Drop repeated queries (case-insensitive) so each is embedded and searched once;
+    # a duplicate would otherwise also double its hits' RRF weight
+    unique: List[str] = []
+    seen = set()
+    for q in queries:
+        key = q.lower()
+        if key not in seen:
+            seen.add(key)
+            unique.append(q)
+    queries = unique
     if not queries:
         return []
 
-    # 1) Embed queries locally (MiniLM; free)
-    qvecs = embed_texts(queries)
+    # 1) Embed queries locally (MiniLM; free) -- one batched encode for the uncached ones
+    qvecs = _embed_queries(queries)
 
-    # 2) Search Pinecone in the provided namespace
-    ranked_lists: List[List[Dict[str, Any]]] = []
-    for qv in qvecs:
-        hits = pinecone_query(
+    # 2) Search Pinecone in the provided namespace. Each query is its own network
+    #    round-trip, so run them concurrently; map() keeps them in query order.
+    def _search(qv) -> List[Dict[str, Any]]:
+        return pinecone_query(
             vector=qv,
             namespace=namespace,
             top_k=per_query_k,
             include_metadata=include_text,
         )
-        ranked_lists.append(hits)
 
-    # 3) Fuse with RRF
-    fused = _rrf_fuse(ranked_lists, k=60)
+    with ThreadPoolExecutor(max_workers=min(_MAX_SEARCH_WORKERS, len(qvecs))) as pool:
+        ranked_lists: List[List[Dict[str, Any]]] = list(pool.map(_search, qvecs))
 
-    # 4) Return the top final_k
-    return fused[:final_k]
\ No newline at end of file
+    # 3) Fuse with RRF and 4) keep the top final_k
+    return _rrf_fuse(ranked_lists, k=60, top_n=final_k)
\ No newline at end of file
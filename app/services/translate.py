@@ -1,35 +1,73 @@
 # app/services/translate.py
 
 from typing import Optional, List
+from concurrent.futures import ThreadPoolExecutor
 import time
 
+# Multiple translation engines to try (in order of preference)
+_ENGINES = ['google', 'bing']
+# Upper bound on concurrent chunk requests, to stay polite with the free endpoints
+_MAX_WORKERS = 8
+
 
 def _split_text(text: str, max_len: int = 4999) -> List[str]:
-    """Split text into chunks respecting word boundaries."""
+    """Split text into chunks of at most max_len characters, breaking at spaces."""
     if len(text) <= max_len:
         return [text]
-    
+
+    # Slice on the last space inside each window (str.rfind runs in C) instead
+    # of walking the text word by word
     chunks = []
-    words = text.split()
-    current_chunk = []
-    current_length = 0
-    
-    for word in words:
-        word_len = len(word) + 1
-        if current_length + word_len > max_len:
-            chunks.append(" ".join(current_chunk))
-            current_chunk = [word]
-            current_length = word_len
-        else:
-            current_chunk.append(word)
-            current_length += word_len
-    
-    if current_chunk:
-        chunks.append(" ".join(current_chunk))
-    
+    i, n = 0, len(text)
+    while i < n:
+        end = min(i + max_len, n)
+        nxt = end
+        if end < n:
+            sp = text.rfind(" ", i, end + 1)
+            if sp > i:
+                end, nxt = sp, sp + 1
+        chunk = text[i:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        i = nxt
+
     return chunks
 
 
+def _translate_chunk(ts, chunk: str, chunk_idx: int, source_lang: str, max_retries: int) -> str:
+    """Translate one chunk, trying each engine in turn with retries."""
+    if not chunk.strip():
+        return ""
+
+    last_error = None
+
+    # Try each translation engine
+    for engine in _ENGINES:
+        for attempt in range(max_retries):
+            try:
+                return ts.translate_text(
+                    query_text=chunk,
+                    translator=engine,
+                    from_language=source_lang,
+                    to_language='en'
+                )
+            except Exception as e:
+                last_error = e
+                if attempt < max_retries - 1:
+                    time.sleep(1)
+
+    # If all engines failed for this chunk
+    raise RuntimeError(
+        f"All translation engines failed for chunk {chunk_idx + 1}.\n"
+        f"Tried: {', '.join(_ENGINES)}\n"
+        f"Last error: {last_error}\n"
+        "This may be due to:\n"
+        "- Network connectivity issues\n"
+        "- All services are temporarily unavailable\n"
+        "- Firewall blocking translation APIs"
+    )
+
+
 def translate_to_english(text: str, source_lang: Optional[str] = None, max_retries: int = 3) -> str:
     """
     Translate text to English using translators library with multiple backend fallback.
@@ -48,7 +86,11 @@ def translate_to_english(text: str, source_lang: Optional[str] = None, max_retri
     """
     if not text or not text.strip():
         return text
-    
+
+    # Already English: nothing to send over the network
+    if source_lang and source_lang.lower().split("-")[0] == "en":
+        return text.strip()
+
     try:
         import translators as ts
     except ImportError:
@@ -62,52 +104,16 @@ def translate_to_english(text: str, source_lang: Optional[str] = None, max_retri
     
     # Split text into chunks
     chunks = _split_text(text, max_len=4999)
-    translated_chunks = []
-    
-    # Multiple translation engines to try (in order of preference)
-    engines = ['google', 'bing' ]
-    
-    for chunk_idx, chunk in enumerate(chunks):
-        if not chunk.strip():
-            translated_chunks.append("")
-            continue
-        
-        chunk_translated = False
-        last_error = None
-        
-        # Try each translation engine
-        for engine in engines:
-            for attempt in range(max_retries):
-                try:
-                    result = ts.translate_text(
-                        query_text=chunk,
-                        translator=engine,
-                        from_language=source_lang,
-                        to_language='en'
-                    )
-                    translated_chunks.append(result)
-                    chunk_translated = True
-                    break
-                    
-                except Exception as e:
-                    last_error = e
-                    if attempt < max_retries - 1:
-                        time.sleep(1)
-                        continue
-            
-            if chunk_translated:
-                break
-        
-        # If all engines failed for this chunk
-        if not chunk_translated:
-            raise RuntimeError(
-                f"All translation engines failed for chunk {chunk_idx + 1}.\n"
-                f"Tried: {', '.join(engines)}\n"
-                f"Last error: {last_error}\n"
-                "This may be due to:\n"
-                "- Network connectivity issues\n"
-                "- All services are temporarily unavailable\n"
-                "- Firewall blocking translation APIs"
-            )
-    
-    return " ".join(translated_chunks).strip()
\ No newline at end of file
+
+    # Each chunk is an independent HTTPS round-trip, so translate them
+    # concurrently; map() keeps the results in chunk order
+    if len(chunks) == 1:
+        translated_chunks = [_translate_chunk(ts, chunks[0], 0, source_lang, max_retries)]
+    else:
+        with ThreadPoolExecutor(max_workers=min(_MAX_WORKERS, len(chunks))) as pool:
+            translated_chunks = list(pool.map(
+                lambda item: _translate_chunk(ts, item[1], item[0], source_lang, max_retries),
+                enumerate(chunks),
+            ))
+
+    return " ".join(translated_chunks).strip()
@@ -1,12 +1,27 @@
 """
 Web article scraping and processing service using LangChain WebBaseLoader.
 """
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 from langchain_community.document_loaders import WebBaseLoader
 from app.config import cfg
+from app.services import content_cache
 import logging
 
 logger = logging.getLogger(__name__)
 
+_TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid"}
+
+
+def _cache_url(url: str) -> str:
+    """URL used as the cache key: no fragment and no tracking parameters."""
+    parts = urlsplit(url.strip())
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in _TRACKING_PARAMS
+    ]
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, urlencode(query), ""))
+
+
 def get_article_text(url: str) -> dict:
     """
     Fetch and extract main content from a web article URL.
@@ -21,6 +36,14 @@ def get_article_text(url: str) -> dict:
             - url: str (source URL)
             - lang: str (default 'en')
     """
+    # A recently fetched copy of the same page is reused instead of re-scraping it
+    use_cache = content_cache.cache_enabled() and cfg.SOURCE_CACHE_TTL > 0
+    cache_file = content_cache.cache_path({"kind": "article", "url": _cache_url(url)})
+    if use_cache:
+        cached = content_cache.load_fresh(cache_file, cfg.SOURCE_CACHE_TTL)
+        if cached is not None:
+            return {**cached, "url": url}
+
     try:
         # Initialize WebBaseLoader
         loader = WebBaseLoader(
@@ -49,12 +72,15 @@ def get_article_text(url: str) -> dict:
         # Clean the text content
         text_content = doc.page_content.strip()
         
-        return {
+        article = {
             "title": title or "Untitled Article",
             "text": text_content,
             "url": url,
             "lang": "en"  # Default; can add langdetect later if needed
         }
+        if use_cache:
+            content_cache.store_stamped(cache_file, article)
+        return article
         
     except Exception as e:
         logger.error(f"Failed to fetch article from {url}: {str(e)}")
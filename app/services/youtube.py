@@ -1,11 +1,74 @@
 # app/services/youtube_transcript.py
 
-import re
+import string
+from functools import lru_cache
 from typing import Dict
-from langdetect import detect
+from urllib.parse import parse_qs, urlsplit
+from langdetect import DetectorFactory, detect
 from langchain_community.document_loaders import YoutubeLoader
+import app.config as cfg
+from app.services import content_cache
 from app.services.translate import translate_to_english
 
+# langdetect is randomized by default; a fixed seed makes results repeatable
+DetectorFactory.seed = 0
+
+# Language ID is stable on a few KB of text; scanning a whole transcript only costs time
+_LANG_SAMPLE_CHARS = 4096
+
+# A video ID is always 11 characters from this alphabet
+_VIDEO_ID_CHARS = frozenset(string.ascii_letters + string.digits + "_-")
+# youtube.com/<prefix>/<id> forms
+_ID_PATH_PREFIXES = ("embed", "shorts", "live", "v")
+
+
+def _detect_language(text: str) -> str:
+    sample = text[:_LANG_SAMPLE_CHARS].strip()
+    if len(sample) < 50:
+        return "en"
+    try:
+        return detect(sample)
+    except Exception:
+        return "unknown"
+
+
+def _is_video_id(s: str) -> bool:
+    return len(s) == 11 and _VIDEO_ID_CHARS.issuperset(s)
+
+
+def extract_video_id(url_or_id: str) -> str:
+    """Return the 11-character video ID in a YouTube URL; ValueError if there is none."""
+    return _extract_video_id(url_or_id.strip())
+
+
+# Batches resubmit the same URLs; invalid input raises and is not cached
+@lru_cache(maxsize=1024)
+def _extract_video_id(url_or_id: str) -> str:
+    # A bare ID needs no URL parsing: 11 set-membership checks in C
+    if _is_video_id(url_or_id):
+        return url_or_id
+    # Every accepted URL form contains "youtu" (youtu.be / youtube.com); anything
+    # else is rejected with one substring search instead of a URL parse
+    if "youtu" not in url_or_id.lower():
+        raise ValueError(f"Invalid YouTube URL or ID: {url_or_id}")
+
+    parts = urlsplit(url_or_id if "://" in url_or_id else "https://" + url_or_id)
+    host = (parts.hostname or "").lower()
+    candidate = ""
+    if host == "youtu.be":
+        candidate = parts.path.lstrip("/")[:11]
+    elif host == "youtube.com" or host.endswith(".youtube.com"):
+        if parts.path.rstrip("/") == "/watch":
+            candidate = (parse_qs(parts.query).get("v") or [""])[0][:11]
+        else:
+            segments = parts.path.split("/")
+            if len(segments) > 2 and segments[1] in _ID_PATH_PREFIXES:
+                candidate = segments[2][:11]
+
+    if not _is_video_id(candidate):
+        raise ValueError(f"Invalid YouTube URL or ID: {url_or_id}")
+    return candidate
+
 
 def get_transcript_text(url_or_id: str) -> Dict[str, str]:
     """
@@ -22,16 +85,23 @@ def get_transcript_text(url_or_id: str) -> Dict[str, str]:
         }
     """
     # Extract video ID
-    match = re.search(r"(?:v=|youtu\.be/)([A-Za-z0-9_-]{11})", url_or_id)
-    if not match:
-        raise ValueError(f"Invalid YouTube URL or ID: {url_or_id}")
-    
-    video_id = match.group(1)
-    
+    video_id = extract_video_id(url_or_id)
+
+    # The transcript (already translated) is reused for a while: refetching it is
+    # seconds of network and translation for the same text
+    use_cache = content_cache.cache_enabled() and cfg.SOURCE_CACHE_TTL > 0
+    cache_file = content_cache.cache_path({"kind": "transcript", "video_id": video_id})
+    if use_cache:
+        cached = content_cache.load_fresh(cache_file, cfg.SOURCE_CACHE_TTL)
+        if cached is not None:
+            return cached
+
     try:
         # Load transcript
-        loader = YoutubeLoader.from_youtube_url(
-            url_or_id,
+        # Built from the parsed ID so bare IDs and shorts/live URLs work too;
+        # from_youtube_url would re-parse the URL and reject those
+        loader = YoutubeLoader(
+            video_id,
             add_video_info=False,
             language=["en", "hi"],
         )
@@ -44,28 +114,23 @@ def get_transcript_text(url_or_id: str) -> Dict[str, str]:
         text = " ".join([doc.page_content for doc in docs])
         
         # Detect language
-        try:
-            detected_lang = detect(text) if len(text.strip()) >= 50 else "en"
-        except Exception:
-            detected_lang = "unknown"
+        detected_lang = _detect_language(text)
         
-        # Translate if needed
+        # Translate if needed. "unknown" means langdetect found no usable
+        # features, so the text is kept as-is rather than sent off on a guess.
         final_language = detected_lang
         if detected_lang not in ["en", "unknown"]:
             text = translate_to_english(text, source_lang=detected_lang)
             final_language = "en"
-        elif detected_lang == "unknown":
-            try:
-                text = translate_to_english(text, source_lang="auto")
-                final_language = "en"
-            except Exception:
-                pass
         
-        return {
+        transcript = {
             "video_id": video_id,
             "language": final_language,
             "text": text.strip(),
         }
+        if use_cache:
+            content_cache.store_stamped(cache_file, transcript)
+        return transcript
 
     except Exception as e:
         raise RuntimeError(f"Failed to fetch transcript: {e}") from e
\ No newline at end of file
@@ -0,0 +1,27 @@
+# Gunicorn settings for serving app.server:app in production.
+# Loaded automatically when gunicorn is started from the repository root:
+#   gunicorn app.server:app
+import multiprocessing
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:5000")
+
+# Pipeline requests spend most of their time waiting on Gemini/Pinecone, so each
+# process runs a pool of threads. gevent is avoided on purpose: the Gemini SDK
+# talks gRPC, which does not cooperate with gevent's monkey-patching.
+worker_class = "gthread"
+workers = int(os.environ.get("WEB_CONCURRENCY", min(4, multiprocessing.cpu_count())))
+threads = int(os.environ.get("GUNICORN_THREADS", "16"))
+
+# Import the app (tokenizer, Flask, blueprints) once in the master and fork the
+# workers from it: faster boot and shared read-only pages. Gemini/Pinecone clients
+# are created lazily, so no gRPC or socket state crosses the fork.
+preload_app = True
+
+# A full pipeline run (transcript -> embed -> upsert -> 3 LLM calls) can take minutes.
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "300"))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"